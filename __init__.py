@@ -2,4 +2,15 @@
 
 from . import models
 from . import wizard
-from . import controllers
\ No newline at end of file
+from . import controllers
+
+from odoo.tools.sql import drop_index
+
+
+def post_init_hook(env):
+    env['marketplace.review'].action_rebuild_rating_aggregates()
+
+
+def uninstall_hook(env):
+    # The only index of the module on a table it does not own
+    drop_index(env.cr, models.marketplace_product.STOCK_QUANT_WRITE_DATE_INDEX, 'stock_quant')
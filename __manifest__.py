@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Marketplace - Commerce Platform',
-    'version': '17.0.1.0.0',
+    'version': '17.0.1.1.0',
     'category': 'Sales/eCommerce',
     'summary': 'Online marketplace connecting vendors and customers',
     'description': """
@@ -44,15 +44,20 @@
         # Data
         'data/marketplace_sequence.xml',
         'data/marketplace_email_template.xml',
+        'data/marketplace_cron.xml',
         'data/marketplace_demo.xml',
         
         # Views
         'views/marketplace_vendor_views.xml',
         'views/marketplace_product_views.xml',
         'views/marketplace_order_views.xml',
+        'views/marketplace_order_confirm_job_views.xml',
         'views/marketplace_category_views.xml',
         'views/marketplace_commission_views.xml',
+        'views/marketplace_commission_rule_views.xml',
+        'views/marketplace_payout_run_views.xml',
         'views/marketplace_review_views.xml',
+        'views/marketplace_stock_move_views.xml',
         'views/marketplace_dashboard_views.xml',
         'views/marketplace_menus.xml',
         
@@ -65,7 +70,11 @@
         'report/marketplace_reports.xml',
         
         # Wizards
+        'wizard/marketplace_commission_rerate_wizard_views.xml',
         'wizard/marketplace_mass_confirm_wizard_views.xml',
+        'wizard/marketplace_order_ship_wizard_views.xml',
+        'wizard/marketplace_payout_export_wizard_views.xml',
+        'wizard/marketplace_product_import_wizard_views.xml',
         'wizard/marketplace_vendor_payout_wizard_views.xml',
     ],
     # 'demo': [
@@ -86,4 +95,5 @@
     'application': True,
     'auto_install': False,
     'post_init_hook': 'post_init_hook',
+    'uninstall_hook': 'uninstall_hook',
 }
\ No newline at end of file
@@ -4,6 +4,14 @@ from odoo import http, _
 from odoo.http import request
 from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
 from odoo.exceptions import AccessError, MissingError
+from werkzeug.exceptions import BadRequest
+
+# Models whose images are served publicly, with the domain of the visible records
+IMAGE_MODELS = {
+    'product': ('marketplace.product', [('state', '=', 'published')]),
+    'vendor': ('marketplace.vendor', [('state', '=', 'approved')]),
+    'category': ('marketplace.category', [('active', '=', True)]),
+}
 
 class MarketplacePortal(CustomerPortal):
     """Portal controller for marketplace vendors and customers"""
@@ -67,23 +75,22 @@ class MarketplacePortal(CustomerPortal):
         Product = request.env['marketplace.product']
         domain = [('vendor_id', '=', vendor.id)]
         
-        if search:
-            domain += [('name', 'ilike', search)]
-        
-        # Count
-        product_count = Product.search_count(domain)
+        # Products, ranked by relevance when searching
+        products, product_count = Product._search_ranked(
+            search, domain,
+            limit=self._items_per_page,
+            offset=(int(page) - 1) * self._items_per_page,
+        )
         
         # Pager
         pager = portal_pager(
             url="/my/vendor/products",
+            url_args={'search': search} if search else None,
             total=product_count,
             page=page,
             step=self._items_per_page,
         )
         
-        # Products
-        products = Product.search(domain, limit=self._items_per_page, offset=pager['offset'])
-        
         values = {
             'vendor': vendor,
             'products': products,
@@ -177,6 +184,39 @@ class MarketplacePortal(CustomerPortal):
 class MarketplaceAPI(http.Controller):
     """REST API endpoints for marketplace"""
 
+    @http.route('/marketplace/image/<string:kind>/<int:record_id>/<string:field>/<int:size>',
+                type='http', auth='public', methods=['GET'])
+    def marketplace_image(self, kind, record_id, field, size, unique=None, **kw):
+        """Serve a pre-generated image variant with ETag and cache headers"""
+        if kind not in IMAGE_MODELS:
+            raise request.not_found()
+        model_name, domain = IMAGE_MODELS[kind]
+        Model = request.env[model_name].sudo()
+        variant = Model._image_variants.get(field, {}).get(size)
+        if not variant:
+            raise request.not_found()
+        record = Model.search([('id', '=', record_id)] + domain, limit=1)
+        if not record:
+            raise request.not_found()
+        
+        IrBinary = request.env['ir.binary']
+        if 'image_variants_pending' in record and record.image_variants_pending:
+            # Variants not generated yet: resize on the fly and let clients revalidate
+            stream = IrBinary._get_image_stream_from(record, field, width=size, height=size)
+            return stream.get_response(max_age=0)
+        
+        stream = IrBinary._get_image_stream_from(record, variant)
+        # Versioned URLs never change content, unversioned ones are revalidated daily
+        return stream.get_response(max_age=86400, immutable=bool(unique))
+
+    def _image_urls(self, kind, record, field):
+        """Return the URLs of the image variants of a record, by size"""
+        unique = record.write_date.strftime('%Y%m%d%H%M%S') if record.write_date else ''
+        return {
+            size: f'/marketplace/image/{kind}/{record.id}/{field}/{size}?unique={unique}'
+            for size in record._image_variants[field]
+        }
+
     @http.route('/api/marketplace/products', type='json', auth='public', methods=['GET'], csrf=False)
     def api_get_products(self, **kw):
         """Get published products"""
@@ -188,16 +228,79 @@ class MarketplaceAPI(http.Controller):
                 domain.append(('category_id', '=', int(kw['category_id'])))
             if kw.get('vendor_id'):
                 domain.append(('vendor_id', '=', int(kw['vendor_id'])))
+            
+            # Pagination
+            limit = int(kw.get('limit', 20))
+            offset = int(kw.get('offset', 0))
+            
+            Product = request.env['marketplace.product'].sudo()
             if kw.get('search'):
-                domain.append(('name', 'ilike', kw['search']))
+                # Relevance-ranked full-text search
+                products, total = Product._search_ranked(
+                    kw['search'], domain, limit=limit, offset=offset
+                )
+            else:
+                products = Product.search(
+                    domain, limit=limit, offset=offset, order='create_date desc'
+                )
+                total = Product.search_count(domain)
+            
+            return {
+                'success': True,
+                'data': [{
+                    'id': p.id,
+                    'name': p.name,
+                    'code': p.code,
+                    'vendor': p.vendor_id.name,
+                    'category': p.category_id.name,
+                    'price': p.list_price,
+                    'discount_price': p.discount_price if p.has_discount else None,
+                    'rating': p.average_rating,
+                    'stock_status': p.stock_status,
+                    'images': self._image_urls('product', p, 'image_1920'),
+                } for p in products],
+                'total': total
+            }
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    @http.route('/api/marketplace/products/browse', type='json', auth='public', methods=['GET'], csrf=False)
+    def api_browse_products(self, **kw):
+        """Get a page of published products with the facet counts of the filtered set"""
+        try:
+            domain = [('state', '=', 'published')]
+            
+            # Facet filters
+            if kw.get('category_id'):
+                domain.append(('category_id', 'child_of', int(kw['category_id'])))
+            if kw.get('vendor_id'):
+                domain.append(('vendor_id', '=', int(kw['vendor_id'])))
+            if kw.get('tag_ids'):
+                domain.append(('tag_ids', 'in', self._parse_id_list(kw['tag_ids'], 'tag_ids')))
+            if kw.get('stock_status'):
+                domain.append(('stock_status', '=', kw['stock_status']))
+            if kw.get('min_price') is not None:
+                domain.append(('discount_price', '>=', float(kw['min_price'])))
+            if kw.get('max_price') is not None:
+                domain.append(('discount_price', '<', float(kw['max_price'])))
+            if kw.get('min_rating'):
+                domain.append(('average_rating', '>=', float(kw['min_rating'])))
             
             # Pagination
             limit = int(kw.get('limit', 20))
             offset = int(kw.get('offset', 0))
             
-            products = request.env['marketplace.product'].sudo().search(
-                domain, limit=limit, offset=offset, order='create_date desc'
-            )
+            Product = request.env['marketplace.product'].sudo()
+            search = (kw.get('search') or '').strip()
+            if search:
+                products, total = Product._search_ranked(
+                    search, domain, limit=limit, offset=offset
+                )
+            else:
+                products = Product.search(
+                    domain, limit=limit, offset=offset, order='create_date desc'
+                )
+                total = Product.search_count(domain)
             
             return {
                 'success': True,
@@ -211,12 +314,27 @@ class MarketplaceAPI(http.Controller):
                     'discount_price': p.discount_price if p.has_discount else None,
                     'rating': p.average_rating,
                     'stock_status': p.stock_status,
+                    'images': self._image_urls('product', p, 'image_1920'),
                 } for p in products],
-                'total': request.env['marketplace.product'].sudo().search_count(domain)
+                'total': total,
+                'facets': Product._get_facet_counts(domain, search),
             }
+        except BadRequest:
+            raise
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def _parse_id_list(self, value, name):
+        """Return the ids of a JSON list or a comma-separated string like ``"3,5"``"""
+        if isinstance(value, (str, int)):
+            value = str(value).split(',')
+        if not isinstance(value, list):
+            raise BadRequest(_('Invalid %s: expected a list of ids') % name)
+        try:
+            return [int(str(item).strip()) for item in value if str(item).strip()]
+        except ValueError:
+            raise BadRequest(_('Invalid %s: %s') % (name, value))
+
     @http.route('/api/marketplace/products/<int:product_id>', type='json', auth='public', methods=['GET'], csrf=False)
     def api_get_product_details(self, product_id, **kw):
         """Get product details"""
@@ -238,14 +356,18 @@ class MarketplaceAPI(http.Controller):
                         'id': product.vendor_id.id,
                         'name': product.vendor_id.name,
                         'rating': product.vendor_id.average_rating,
+                        'review_count': product.vendor_id.review_count,
+                        'logo': self._image_urls('vendor', product.vendor_id, 'logo'),
                     },
                     'category': product.category_id.name,
                     'price': product.list_price,
                     'discount_price': product.discount_price if product.has_discount else None,
                     'rating': product.average_rating,
                     'review_count': product.review_count,
+                    'rating_histogram': product._get_rating_histogram(),
                     'stock_status': product.stock_status,
                     'qty_available': product.qty_available,
+                    'images': self._image_urls('product', product, 'image_1920'),
                 }
             }
         except Exception as e:
@@ -272,6 +394,8 @@ class MarketplaceAPI(http.Controller):
                     'code': v.code,
                     'rating': v.average_rating,
                     'product_count': v.product_count,
+                    'logo': self._image_urls('vendor', v, 'logo'),
+                    'banner': self._image_urls('vendor', v, 'banner_image'),
                 } for v in vendors],
                 'total': request.env['marketplace.vendor'].sudo().search_count(domain)
             }
@@ -291,59 +415,95 @@ class MarketplaceAPI(http.Controller):
                     'name': c.name,
                     'complete_name': c.complete_name,
                     'product_count': c.product_count,
+                    'images': self._image_urls('category', c, 'image'),
                 } for c in categories]
             }
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def _idempotent(self, endpoint, payload, handler):
+        """Run ``handler`` once per Idempotency-Key header value.
+
+        Retries with the same key get the stored response back; failed
+        calls release their key so that they can be retried. A handler may
+        fail on a database error, so its work is rolled back to a savepoint
+        taken after the claim before the key is released.
+        """
+        key = request.httprequest.headers.get('Idempotency-Key')
+        if not key:
+            return handler(**payload)
+        if len(key) > 255:
+            return {'success': False, 'error': 'Idempotency key too long'}
+        
+        IdempotencyKey = request.env['marketplace.idempotency.key'].sudo()
+        claimed, response = IdempotencyKey._claim(key, endpoint, payload)
+        if not claimed:
+            return response
+        
+        with request.env.cr.savepoint() as savepoint:
+            response = handler(**payload)
+            if not response.get('success'):
+                savepoint.rollback()
+        if response.get('success'):
+            IdempotencyKey._store(key, endpoint, response)
+        else:
+            IdempotencyKey._release(key, endpoint)
+        return response
+
     @http.route('/api/marketplace/orders/create', type='json', auth='user', methods=['POST'], csrf=False)
     def api_create_order(self, **kw):
         """Create new order (requires authentication)"""
+        return self._idempotent('orders/create', kw, self._create_order)
+
+    def _create_order(self, **kw):
         try:
-            order_lines = kw.get('order_lines', [])
-            if not order_lines:
-                return {'success': False, 'error': 'No order lines provided'}
-            
-            # Validate products
-            product_ids = [line['product_id'] for line in order_lines]
-            products = request.env['marketplace.product'].sudo().browse(product_ids)
-            
-            if len(products) != len(product_ids):
-                return {'success': False, 'error': 'Invalid product(s)'}
-            
-            # Group by vendor
-            vendor_orders = {}
-            for line in order_lines:
-                product = products.filtered(lambda p: p.id == line['product_id'])
-                vendor_id = product.vendor_id.id
-                
-                if vendor_id not in vendor_orders:
-                    vendor_orders[vendor_id] = []
-                vendor_orders[vendor_id].append({
-                    'product_id': product.id,
-                    'product_name': product.name,
-                    'quantity': line['quantity'],
-                    'price_unit': product.discount_price or product.list_price,
-                })
+            Order = request.env['marketplace.order'].sudo()
+            # One draft order per vendor, created in one batch
+            orders = Order.create(Order._prepare_checkout_vals(
+                request.env.user.partner_id,
+                kw.get('order_lines', []),
+                shipping_address_id=kw.get('shipping_address_id'),
+                payment_method=kw.get('payment_method', 'card'),
+            ))
             
-            # Create orders per vendor
-            created_orders = []
-            for vendor_id, lines in vendor_orders.items():
-                order_vals = {
-                    'customer_id': request.env.user.partner_id.id,
-                    'vendor_id': vendor_id,
-                    'order_line_ids': [(0, 0, line) for line in lines],
-                    'shipping_address_id': kw.get('shipping_address_id'),
-                    'payment_method': kw.get('payment_method', 'card'),
-                }
-                
-                order = request.env['marketplace.order'].sudo().create(order_vals)
-                created_orders.append(order.id)
+            return {
+                'success': True,
+                'order_ids': orders.ids,
+                'message': f'{len(orders)} order(s) created successfully'
+            }
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    @http.route('/api/marketplace/checkout', type='json', auth='user', methods=['POST'], csrf=False)
+    def api_checkout(self, **kw):
+        """Check out a multi-vendor cart: create and confirm one order per vendor"""
+        return self._idempotent('checkout', kw, self._checkout)
+
+    def _checkout(self, **kw):
+        try:
+            orders = request.env['marketplace.order'].sudo()._checkout(
+                request.env.user.partner_id,
+                kw.get('order_lines', []),
+                shipping_address_id=kw.get('shipping_address_id'),
+                payment_method=kw.get('payment_method', 'card'),
+            )
             
             return {
                 'success': True,
-                'order_ids': created_orders,
-                'message': f'{len(created_orders)} order(s) created successfully'
+                'data': {
+                    'orders': [{
+                        'id': order.id,
+                        'name': order.name,
+                        'vendor_id': order.vendor_id.id,
+                        'vendor': order.vendor_id.name,
+                        'amount_untaxed': order.amount_untaxed,
+                        'amount_tax': order.amount_tax,
+                        'amount_total': order.amount_total,
+                    } for order in orders],
+                    'amount_total': sum(orders.mapped('amount_total')),
+                    'currency': orders[:1].currency_id.name,
+                },
+                'message': f'{len(orders)} order(s) confirmed'
             }
         except Exception as e:
             return {'success': False, 'error': str(e)}
\ No newline at end of file
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Fill the rating_sum, rating_count and rating_N_count columns added in
+    this version from the published reviews: without it every existing
+    product and vendor would show no rating. It also corrects aggregates
+    that drifted since, e.g. reviews deleted in cascade with their product.
+    """
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['marketplace.review'].action_rebuild_rating_aggregates()
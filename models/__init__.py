@@ -1,8 +1,18 @@
 # -*- coding: utf-8 -*-
 
+from . import ir_sequence
+from . import marketplace_counter_mixin
+from . import marketplace_rating_mixin
+from . import marketplace_image_variant_mixin
 from . import marketplace_vendor
 from . import marketplace_category
 from . import marketplace_product
 from . import marketplace_order
+from . import marketplace_order_confirm_job
 from . import marketplace_commission
-from . import marketplace_review
\ No newline at end of file
+from . import marketplace_commission_audit
+from . import marketplace_commission_rule
+from . import marketplace_payout_run
+from . import marketplace_review
+from . import marketplace_stock_move
+from . import marketplace_idempotency_key
\ No newline at end of file
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class IrSequence(models.Model):
+    _inherit = 'ir.sequence'
+
+    @api.model
+    def _next_batch_by_code(self, sequence_code, count):
+        """Return ``count`` values of the sequence ``sequence_code``.
+
+        The numbers of standard sequences are reserved in a single query;
+        no-gap and date-range sequences fall back to one call per value.
+        Like next_by_code, returns False values if no sequence is found.
+        """
+        if count <= 0:
+            return []
+        self.check_access_rights('read')
+        company_id = self.env.company.id
+        sequence = self.search([
+            ('code', '=', sequence_code),
+            ('company_id', 'in', [company_id, False]),
+        ], order='company_id', limit=1)
+        if not sequence:
+            _logger.debug("No ir.sequence has been found for code '%s'. Please make sure "
+                          "a sequence is set for current company.", sequence_code)
+            return [False] * count
+
+        if sequence.implementation != 'standard' or sequence.use_date_range:
+            return [sequence._next() for dummy in range(count)]
+
+        self.env.cr.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            ['ir_sequence_%03d' % sequence.id, count],
+        )
+        numbers = sorted(row[0] for row in self.env.cr.fetchall())
+        return [sequence.get_next_char(number) for number in numbers]
@@ -7,10 +7,14 @@ class MarketplaceCategory(models.Model):
     """Product categories for marketplace"""
     _name = 'marketplace.category'
     _description = 'Marketplace Category'
+    _inherit = ['marketplace.image.variant.mixin']
     _parent_name = 'parent_id'
     _parent_store = True
     _rec_name = 'complete_name'
     _order = 'complete_name'
+    _image_variants = {
+        'image': {128: 'image_128', 512: 'image_512'},
+    }
 
     name = fields.Char(string='Category Name', required=True, translate=True, index=True)
     complete_name = fields.Char(
@@ -30,6 +34,10 @@ class MarketplaceCategory(models.Model):
     
     description = fields.Text(string='Description', translate=True)
     image = fields.Binary(string='Category Image', attachment=True)
+    image_128 = fields.Image(string='Image 128', max_width=128, max_height=128,
+                             readonly=True, copy=False)
+    image_512 = fields.Image(string='Image 512', max_width=512, max_height=512,
+                             readonly=True, copy=False)
     
     product_ids = fields.One2many('marketplace.product', 'category_id', string='Products')
     product_count = fields.Integer(string='Product Count', compute='_compute_product_count')
@@ -2,6 +2,14 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.tools.sql import create_index
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+import logging
+import threading
+import pytz
+
+_logger = logging.getLogger(__name__)
 
 class MarketplaceCommission(models.Model):
     """Commission tracking for vendor sales"""
@@ -21,8 +29,19 @@ class MarketplaceCommission(models.Model):
     order_amount = fields.Monetary(string='Order Amount', required=True,
                                    currency_field='currency_id')
     
-    commission_type = fields.Selection(related='vendor_id.commission_type', store=True)
-    commission_rate = fields.Float(related='vendor_id.commission_rate', store=True)
+    # Rates of the vendor when the commission was created, only changed by re-rating
+    commission_type = fields.Selection([
+        ('percentage', 'Percentage'),
+        ('fixed', 'Fixed Amount'),
+        ('rules', 'Commission Rules'),
+    ], string='Commission Type', readonly=True)
+    commission_rate = fields.Float(string='Commission Rate (%)', digits='Product Price',
+                                   readonly=True)
+    fixed_amount = fields.Monetary(string='Fixed Commission', readonly=True,
+                                   currency_field='currency_id')
+    rules_amount = fields.Monetary(string='Rule-based Commission', readonly=True,
+                                   currency_field='currency_id',
+                                   help="Commission priced by the commission rules on the order lines")
     
     commission_amount = fields.Monetary(string='Commission', 
                                        compute='_compute_commission', store=True,
@@ -43,33 +62,165 @@ class MarketplaceCommission(models.Model):
     payout_id = fields.Many2one('marketplace.payout', string='Payout')
     payment_date = fields.Date(string='Payment Date', readonly=True)
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        pending = [vals for vals in vals_list if vals.get('name', '/') == '/']
+        names = self.env['ir.sequence']._next_batch_by_code('marketplace.commission', len(pending))
+        for vals, name in zip(pending, names):
+            vals['name'] = name or '/'
+        
+        # Snapshot the vendor rates
+        vendors = self.env['marketplace.vendor'].browse(
+            list({vals['vendor_id'] for vals in vals_list if vals.get('vendor_id')})
+        )
+        vendors_by_id = {vendor.id: vendor for vendor in vendors}
+        for vals in vals_list:
+            if 'commission_type' not in vals and vals.get('vendor_id'):
+                vals.update(self._get_rate_vals(vendors_by_id[vals['vendor_id']]))
+        
+        # Price the rule-based commissions of all the orders at once
+        rules_vals = [vals for vals in vals_list
+                      if vals.get('commission_type') == 'rules' and vals.get('order_id')
+                      and 'rules_amount' not in vals]
+        if rules_vals:
+            amounts = self.env['marketplace.commission.rule']._compute_order_commissions(
+                self.env['marketplace.order'].browse([vals['order_id'] for vals in rules_vals])
+            )
+            for vals in rules_vals:
+                vals['rules_amount'] = amounts[vals['order_id']]
+        return super(MarketplaceCommission, self).create(vals_list)
+
+    def init(self):
+        # Draft commissions, scanned by the confirmation cron
+        create_index(self.env.cr, 'marketplace_commission_draft_order_index', self._table,
+                     ['order_id'], where="state = 'draft'")
+        # Commissions created before the snapshot keep their fixed amount
+        self.env.cr.execute("""
+            UPDATE marketplace_commission
+               SET fixed_amount = commission_amount
+             WHERE commission_type = 'fixed' AND fixed_amount IS NULL
+        """)
+
     @api.model
-    def create(self, vals):
-        if vals.get('name', '/') == '/':
-            vals['name'] = self.env['ir.sequence'].next_by_code('marketplace.commission') or '/'
-        return super(MarketplaceCommission, self).create(vals)
+    def _get_rate_vals(self, vendor):
+        """Rate snapshot of ``vendor`` stored on its commissions"""
+        return {
+            'commission_type': vendor.commission_type,
+            'commission_rate': vendor.commission_rate,
+            'fixed_amount': vendor.fixed_commission,
+        }
 
-    @api.depends('order_amount', 'commission_rate', 'commission_type')
+    @api.depends('order_amount', 'commission_rate', 'commission_type', 'fixed_amount', 'rules_amount')
     def _compute_commission(self):
         for comm in self:
             if comm.commission_type == 'percentage':
                 comm.commission_amount = (comm.order_amount or 0.0) * (comm.commission_rate or 0.0) / 100.0
+            elif comm.commission_type == 'rules':
+                comm.commission_amount = comm.rules_amount or 0.0
             else:
-                # Use vendor fixed commission if set, otherwise 0.0
-                comm.commission_amount = comm.vendor_id.fixed_commission or 0.0
+                comm.commission_amount = comm.fixed_amount or 0.0
 
             comm.vendor_amount = (comm.order_amount or 0.0) - (comm.commission_amount or 0.0)
 
+    def _rerate(self, batch_size=1000):
+        """Apply the current vendor rates to the commissions, paid ones excepted.
+
+        The commissions are rewritten per batch with one write per vendor,
+        returns the number of re-rated commissions.
+        """
+        commissions = self.filtered(lambda c: c.state != 'paid')
+        for start in range(0, len(commissions), batch_size):
+            batch = commissions[start:start + batch_size]
+            by_vendor = defaultdict(list)
+            for comm in batch:
+                by_vendor[comm.vendor_id].append(comm.id)
+            for vendor, ids in by_vendor.items():
+                self.browse(ids).write(self._get_rate_vals(vendor))
+            batch.filtered(lambda c: c.commission_type == 'rules')._apply_rule_amounts()
+            self.env.flush_all()
+            self.env.invalidate_all()
+        _logger.info('Re-rated %d commission(s)', len(commissions))
+        return len(commissions)
+
+    def _apply_rule_amounts(self):
+        """Price the commissions with the current rules, in one statement"""
+        if not self:
+            return
+        amounts = self.env['marketplace.commission.rule']._compute_order_commissions(self.order_id)
+        self.flush_recordset(['rules_amount'])
+        self.env.cr.execute("""
+            UPDATE marketplace_commission c
+               SET rules_amount = a.amount
+              FROM unnest(%s::int[], %s::numeric[]) AS a(id, amount)
+             WHERE c.id = a.id
+        """, [self.ids, [amounts[comm.order_id.id] for comm in self]])
+        self.invalidate_recordset(['rules_amount'])
+        self.modified(['rules_amount'])
+
     def action_confirm(self):
         self.write({'state': 'confirmed'})
-        self.message_post(body=_('Commission confirmed'))
+        self._message_log_batch(bodies={comm.id: _('Commission confirmed') for comm in self})
+
+    @api.model
+    def _cron_confirm_commissions(self, chunk_size=1000):
+        """Confirm the draft commissions of the orders delivered for longer than
+        the holding period, one UPDATE and one audit entry per chunk"""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        holding_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'odoo_marketplace.commission_holding_days', 14
+        ))
+        self.env['marketplace.order'].flush_model(['state', 'delivered_date'])
+        self.flush_model(['state', 'order_id'])
+        # Orders delivered before delivered_date existed fall back on their last write
+        self.env.cr.execute("""
+            SELECT c.id
+              FROM marketplace_commission c
+              JOIN marketplace_order o ON o.id = c.order_id
+             WHERE c.state = 'draft'
+               AND o.state IN ('delivered', 'done')
+               AND COALESCE(o.delivered_date, o.write_date) <= %s
+          ORDER BY c.id
+        """, [fields.Datetime.now() - timedelta(days=holding_days)])
+        commission_ids = [row[0] for row in self.env.cr.fetchall()]
+
+        for start in range(0, len(commission_ids), chunk_size):
+            self._confirm_chunk(commission_ids[start:start + chunk_size])
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        _logger.info('Confirmed %d commission(s) after a %d day holding period',
+                     len(commission_ids), holding_days)
+
+    @api.model
+    def _confirm_chunk(self, commission_ids):
+        """Confirm the still draft commissions of ``commission_ids`` and audit the batch"""
+        self.env.cr.execute("""
+            UPDATE marketplace_commission
+               SET state = 'confirmed', write_uid = %s, write_date = (now() AT TIME ZONE 'UTC')
+             WHERE id = ANY(%s) AND state = 'draft'
+         RETURNING id, vendor_id, commission_amount
+        """, [self.env.uid, commission_ids])
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return
+        commissions = self.browse([row[0] for row in rows])
+        commissions.invalidate_recordset(['state', 'write_uid', 'write_date'])
+        commissions.modified(['state'])
+        self.env['marketplace.commission.audit'].create({
+            'action': 'confirm',
+            'commission_count': len(rows),
+            'vendor_count': len({row[1] for row in rows}),
+            'amount': sum(row[2] or 0.0 for row in rows),
+            'commission_ids': commissions.ids,
+            'note': _('Holding period elapsed'),
+        })
 
     def action_mark_paid(self):
         self.write({
             'state': 'paid',
             'payment_date': fields.Date.context_today(self),
         })
-        self.message_post(body=_('Commission paid'))
+        self._message_log_batch(bodies={comm.id: _('Commission paid') for comm in self})
 
 
 class MarketplacePayout(models.Model):
@@ -86,6 +237,8 @@ class MarketplacePayout(models.Model):
     
     commission_ids = fields.One2many('marketplace.commission', 'payout_id', 
                                     string='Commissions')
+    run_id = fields.Many2one('marketplace.payout.run', string='Payout Run', readonly=True,
+                             ondelete='set null', index='btree_not_null')
     
     amount = fields.Monetary(string='Payout Amount', compute='_compute_amount', 
                             store=True, currency_field='currency_id')
@@ -108,16 +261,99 @@ class MarketplacePayout(models.Model):
     
     notes = fields.Text(string='Notes')
 
-    @api.model
-    def create(self, vals):
-        if vals.get('name', '/') == '/':
-            vals['name'] = self.env['ir.sequence'].next_by_code('marketplace.payout') or '/'
-        return super(MarketplacePayout, self).create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        pending = [vals for vals in vals_list if vals.get('name', '/') == '/']
+        names = self.env['ir.sequence']._next_batch_by_code('marketplace.payout', len(pending))
+        for vals, name in zip(pending, names):
+            vals['name'] = name or '/'
+        return super(MarketplacePayout, self).create(vals_list)
 
     @api.depends('commission_ids.vendor_amount')
     def _compute_amount(self):
+        """Sum the commissions with one grouped query instead of loading them"""
+        amounts = {}
+        if self.ids:
+            amounts = {
+                payout.id: amount
+                for payout, amount in self.env['marketplace.commission']._read_group(
+                    [('payout_id', 'in', self.ids)],
+                    ['payout_id'], ['vendor_amount:sum'],
+                )
+            }
         for payout in self:
-            payout.amount = sum(payout.commission_ids.mapped('vendor_amount'))
+            payout.amount = amounts.get(payout._origin.id, 0.0)
+
+    @api.model
+    def _create_payouts(self, cutoff_date=None, minimum_amount=0.0, vendor_ids=None, vals=None,
+                        check_minimum=True):
+        """Pay out the confirmed commissions created up to ``cutoff_date``.
+
+        The unpaid amounts are summed per vendor and currency in SQL. Unless
+        ``check_minimum`` is False, vendors below ``minimum_amount`` or their
+        own minimum payout are skipped. Without ``cutoff_date`` all the unpaid
+        commissions are paid out. The payouts are created in one batch with
+        ``vals`` and the commissions linked in one statement. Returns the payouts.
+        """
+        Commission = self.env['marketplace.commission']
+        Commission.flush_model(['state', 'payout_id', 'vendor_id', 'currency_id', 'vendor_amount'])
+        cutoff_clause = 'AND c.create_date < %(cutoff)s' if cutoff_date else ''
+        vendor_clause = 'AND c.vendor_id = ANY(%(vendor_ids)s)' if vendor_ids else ''
+        minimum_clause = ('AND SUM(c.vendor_amount) >= GREATEST(%(minimum)s, MAX(COALESCE(v.minimum_payout, 0)))'
+                          if check_minimum else '')
+        params = {
+            'cutoff': cutoff_date and self._get_cutoff_datetime(cutoff_date),
+            'minimum': minimum_amount,
+            'vendor_ids': vendor_ids,
+        }
+        self.env.cr.execute(f"""
+            SELECT c.vendor_id, c.currency_id
+              FROM marketplace_commission c
+              JOIN marketplace_vendor v ON v.id = c.vendor_id
+             WHERE c.state = 'confirmed'
+               AND c.payout_id IS NULL
+               {cutoff_clause}
+               {vendor_clause}
+          GROUP BY c.vendor_id, c.currency_id
+            HAVING SUM(c.vendor_amount) > 0
+               {minimum_clause}
+          ORDER BY c.vendor_id
+        """, params)
+        groups = self.env.cr.fetchall()
+        if not groups:
+            return self
+        payouts = self.create([
+            dict(vals or {}, vendor_id=vendor_id, currency_id=currency_id)
+            for vendor_id, currency_id in groups
+        ])
+
+        # Link the commissions of every payout in one statement
+        params.update(vendor_ids=[group[0] for group in groups],
+                      currency_ids=[group[1] for group in groups],
+                      payout_ids=payouts.ids)
+        self.env.cr.execute(f"""
+            UPDATE marketplace_commission c
+               SET payout_id = p.payout_id
+              FROM unnest(%(vendor_ids)s::int[], %(currency_ids)s::int[], %(payout_ids)s::int[])
+                   AS p(vendor_id, currency_id, payout_id)
+             WHERE c.vendor_id = p.vendor_id
+               AND c.currency_id IS NOT DISTINCT FROM p.currency_id
+               AND c.state = 'confirmed'
+               AND c.payout_id IS NULL
+               {cutoff_clause}
+        """, params)
+        Commission.invalidate_model(['payout_id'])
+        payouts.invalidate_recordset(['commission_ids'])
+        self.env.add_to_compute(self._fields['amount'], payouts)
+        payouts.flush_recordset(['amount'])
+        _logger.info('Created %d payout(s) for commissions up to %s', len(payouts), cutoff_date or 'now')
+        return payouts
+
+    def _get_cutoff_datetime(self, cutoff_date):
+        """End of ``cutoff_date`` in the timezone of the user, as a naive UTC datetime"""
+        tz = pytz.timezone(self.env.context.get('tz') or self.env.user.tz or 'UTC')
+        end_of_day = datetime.combine(fields.Date.to_date(cutoff_date) + timedelta(days=1), time.min)
+        return tz.localize(end_of_day).astimezone(pytz.utc).replace(tzinfo=None)
 
     def action_confirm(self):
         self.write({'state': 'confirmed'})
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields
+
+
+class MarketplaceCommissionAudit(models.Model):
+    """
+    One entry per batch of commissions changed by an automated job,
+    instead of a chatter message on every commission.
+    """
+    _name = 'marketplace.commission.audit'
+    _description = 'Marketplace Commission Audit'
+    _order = 'id desc'
+
+    action = fields.Selection([
+        ('confirm', 'Confirmation'),
+    ], string='Action', required=True, readonly=True)
+    commission_count = fields.Integer(string='Commissions', readonly=True)
+    vendor_count = fields.Integer(string='Vendors', readonly=True)
+    amount = fields.Monetary(string='Commission Amount', readonly=True, currency_field='currency_id')
+    currency_id = fields.Many2one('res.currency', string='Currency', readonly=True,
+                                  default=lambda self: self.env.company.currency_id)
+    commission_ids = fields.Json(string='Commission IDs', readonly=True)
+    note = fields.Char(string='Note', readonly=True)
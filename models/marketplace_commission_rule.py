@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+from collections import defaultdict, namedtuple
+
+from .marketplace_vendor import VENDOR_TIERS
+
+# Rule values kept in the per-worker cache, records cannot be cached
+CompiledRule = namedtuple('CompiledRule', [
+    'id', 'sequence', 'vendor_tier', 'sales_min', 'sales_max',
+    'date_from', 'date_to', 'commission_type', 'rate', 'fixed_amount',
+])
+
+
+class MarketplaceCommissionRule(models.Model):
+    """
+    Commission rules for vendors using rule-based commissions.
+    Each order line is priced by the first matching rule (by sequence)
+    on its category subtree, the vendor tier, the vendor sales volume
+    and the order date.
+    """
+    _name = 'marketplace.commission.rule'
+    _description = 'Marketplace Commission Rule'
+    _order = 'sequence, id'
+
+    name = fields.Char(string='Rule Name', required=True)
+    sequence = fields.Integer(string='Sequence', default=10)
+    active = fields.Boolean(string='Active', default=True)
+
+    # Conditions, empty ones match everything
+    category_id = fields.Many2one(
+        'marketplace.category',
+        string='Category',
+        ondelete='cascade',
+        help="Applies to the products of this category and its subcategories"
+    )
+    vendor_tier = fields.Selection(VENDOR_TIERS, string='Vendor Tier')
+    sales_min = fields.Monetary(string='Minimum Vendor Sales', currency_field='currency_id')
+    sales_max = fields.Monetary(
+        string='Maximum Vendor Sales',
+        currency_field='currency_id',
+        help="Exclusive upper bound of the vendor total sales, 0 means no limit"
+    )
+    date_from = fields.Date(string='Valid From')
+    date_to = fields.Date(string='Valid To')
+
+    # Commission
+    commission_type = fields.Selection([
+        ('percentage', 'Percentage'),
+        ('fixed', 'Fixed Amount per Unit'),
+    ], string='Commission Type', default='percentage', required=True)
+    commission_rate = fields.Float(string='Commission Rate (%)', digits='Product Price')
+    fixed_amount = fields.Monetary(string='Fixed Amount', currency_field='currency_id')
+    currency_id = fields.Many2one('res.currency', string='Currency',
+                                  default=lambda self: self.env.company.currency_id)
+
+    _sql_constraints = [
+        ('commission_rate_range', 'CHECK(commission_rate >= 0 AND commission_rate <= 100)',
+         'Commission rate must be between 0 and 100!'),
+    ]
+
+    @api.constrains('date_from', 'date_to', 'sales_min', 'sales_max')
+    def _check_ranges(self):
+        for rule in self:
+            if rule.date_from and rule.date_to and rule.date_from > rule.date_to:
+                raise ValidationError(_('The rule %s ends before it starts.') % rule.name)
+            if rule.sales_max and rule.sales_max <= rule.sales_min:
+                raise ValidationError(_('The sales band of the rule %s is empty.') % rule.name)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super(MarketplaceCommissionRule, self).create(vals_list)
+        self.env.registry.clear_cache()
+        return rules
+
+    def write(self, vals):
+        res = super(MarketplaceCommissionRule, self).write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super(MarketplaceCommissionRule, self).unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    @api.model
+    @tools.ormcache()
+    def _get_rule_lookup(self):
+        """Return ``{category id or False: (CompiledRule, ...)}`` of the active rules"""
+        lookup = defaultdict(list)
+        for rule in self.sudo().search([]):
+            lookup[rule.category_id.id].append(CompiledRule(
+                rule.id, rule.sequence, rule.vendor_tier or None,
+                rule.sales_min, rule.sales_max or None,
+                rule.date_from, rule.date_to,
+                rule.commission_type, rule.commission_rate, rule.fixed_amount,
+            ))
+        return {category_id: tuple(rules) for category_id, rules in lookup.items()}
+
+    @api.model
+    def _match_rule(self, lookup, category_ids, tier, sales, date):
+        """Return the first rule matching the line conditions, or None"""
+        best = None
+        for category_id in category_ids:
+            for rule in lookup.get(category_id, ()):
+                if best and (rule.sequence, rule.id) >= (best.sequence, best.id):
+                    # Rules are sorted, the next ones of this category cannot win
+                    break
+                if ((rule.vendor_tier is None or rule.vendor_tier == tier)
+                        and rule.sales_min <= sales
+                        and (rule.sales_max is None or sales < rule.sales_max)
+                        and (not rule.date_from or rule.date_from <= date)
+                        and (not rule.date_to or date <= rule.date_to)):
+                    best = rule
+                    break
+        return best
+
+    @api.model
+    def _compute_order_commissions(self, orders):
+        """Price the lines of ``orders`` with the rules, return ``{order_id: commission}``.
+
+        Lines matched by no rule use the commission rate of the vendor.
+        """
+        lookup = self._get_rule_lookup()
+        lines = self.env['marketplace.order.line'].search_fetch(
+            [('order_id', 'in', orders.ids)],
+            ['order_id', 'product_id', 'quantity', 'subtotal'],
+        )
+        ancestors = {}
+        amounts = dict.fromkeys(orders.ids, 0.0)
+        for line in lines:
+            order = line.order_id
+            vendor = order.vendor_id
+            category = line.product_id.category_id
+            if category.id not in ancestors:
+                ancestors[category.id] = [False] + [
+                    int(category_id) for category_id in (category.parent_path or '').split('/') if category_id
+                ]
+            rule = self._match_rule(lookup, ancestors[category.id], vendor.tier,
+                                    vendor.total_sales, order.order_date.date())
+            if rule is None:
+                amounts[order.id] += line.subtotal * (vendor.commission_rate or 0.0) / 100.0
+            elif rule.commission_type == 'percentage':
+                amounts[order.id] += line.subtotal * rule.rate / 100.0
+            else:
+                amounts[order.id] += line.quantity * rule.fixed_amount
+        return amounts
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models
+
+
+class MarketplaceCounterMixin(models.AbstractModel):
+    """
+    Helpers for stored counters that are maintained incrementally
+    instead of being recomputed from their source rows.
+    """
+    _name = 'marketplace.counter.mixin'
+    _description = 'Marketplace Incremental Counters'
+
+    def _increment_counters(self, deltas):
+        """Add signed deltas to stored counter columns in a single UPDATE.
+
+        :param deltas: ``{record_id: {field_name: delta}}``
+        """
+        deltas = {record_id: values for record_id, values in deltas.items() if record_id}
+        fnames = sorted({fname for values in deltas.values() for fname in values})
+        if not fnames:
+            return
+
+        record_ids = sorted(deltas)
+        columns = [
+            [deltas[record_id].get(fname, 0) for record_id in record_ids]
+            for fname in fnames
+        ]
+        self.flush_model(fnames)
+        assignments = ', '.join(
+            f'"{fname}" = COALESCE(t."{fname}", 0) + d."{fname}"' for fname in fnames
+        )
+        arrays = ', '.join(['%s::numeric[]'] * len(fnames))
+        aliases = ', '.join(f'"{fname}"' for fname in fnames)
+        self.env.cr.execute(f"""
+            UPDATE "{self._table}" AS t
+               SET {assignments}
+              FROM unnest(%s::int[], {arrays}) AS d(id, {aliases})
+             WHERE t.id = d.id
+        """, [record_ids] + columns)
+
+        records = self.browse(record_ids)
+        records.invalidate_recordset(fnames)
+        records.modified(fnames)
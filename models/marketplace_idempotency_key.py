@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from datetime import timedelta
+import hashlib
+import json
+import logging
+import threading
+
+_logger = logging.getLogger(__name__)
+
+
+class MarketplaceIdempotencyKey(models.Model):
+    """
+    Responses of the API calls sent with an Idempotency-Key header.
+    A retried call with the same key gets the stored response back
+    instead of running again.
+    """
+    _name = 'marketplace.idempotency.key'
+    _description = 'Marketplace API Idempotency Key'
+    _order = 'id desc'
+    _log_access = False
+
+    key = fields.Char(string='Key', required=True)
+    user_id = fields.Many2one('res.users', string='User', required=True, ondelete='cascade')
+    endpoint = fields.Char(string='Endpoint', required=True)
+    request_hash = fields.Char(string='Request Hash', required=True)
+    response = fields.Json(string='Response')
+    expiry_date = fields.Datetime(string='Expiry Date', required=True, index=True)
+
+    _sql_constraints = [
+        ('key_user_endpoint_unique', 'UNIQUE(key, user_id, endpoint)',
+         'Idempotency keys must be unique per user and endpoint!'),
+    ]
+
+    @api.model
+    def _hash_request(self, payload):
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    @api.model
+    def _claim(self, key, endpoint, payload):
+        """Claim ``key`` for the current user, return ``(claimed, stored_response)``.
+
+        A concurrent call with the same key blocks on the unique index until
+        the first transaction ends. If it commits, the key is not visible in
+        the REPEATABLE READ snapshot of the blocked call: PostgreSQL raises a
+        serialization failure, the HTTP layer retries the request and the
+        new attempt gets the stored response. If it rolls back, or released
+        the key, the blocked call claims it. Expired keys are claimed again.
+        """
+        request_hash = self._hash_request(payload)
+        ttl_hours = int(self.env['ir.config_parameter'].sudo().get_param(
+            'odoo_marketplace.idempotency_key_ttl_hours', 24
+        ))
+        expiry_date = fields.Datetime.now() + timedelta(hours=ttl_hours)
+        self.env.cr.execute("""
+            INSERT INTO marketplace_idempotency_key (key, user_id, endpoint, request_hash, expiry_date)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (key, user_id, endpoint) DO UPDATE
+               SET request_hash = EXCLUDED.request_hash,
+                   response = NULL,
+                   expiry_date = EXCLUDED.expiry_date
+             WHERE marketplace_idempotency_key.expiry_date < (now() AT TIME ZONE 'UTC')
+         RETURNING id
+        """, [key, self.env.uid, endpoint, request_hash, expiry_date])
+        if self.env.cr.fetchone():
+            return True, None
+
+        self.env.cr.execute("""
+            SELECT request_hash, response
+              FROM marketplace_idempotency_key
+             WHERE key = %s AND user_id = %s AND endpoint = %s
+        """, [key, self.env.uid, endpoint])
+        stored_hash, response = self.env.cr.fetchone()
+        if stored_hash != request_hash:
+            return False, {'success': False, 'error': 'Idempotency key already used for another request'}
+        if response is None:
+            return False, {'success': False, 'error': 'A request with this idempotency key is in progress'}
+        return False, response
+
+    @api.model
+    def _store(self, key, endpoint, response):
+        """Save the response of a claimed key"""
+        self.env.cr.execute("""
+            UPDATE marketplace_idempotency_key
+               SET response = %s::jsonb
+             WHERE key = %s AND user_id = %s AND endpoint = %s
+        """, [json.dumps(response, default=str), key, self.env.uid, endpoint])
+
+    @api.model
+    def _release(self, key, endpoint):
+        """Forget a claimed key whose call failed, so that it can be retried"""
+        self.env.cr.execute("""
+            DELETE FROM marketplace_idempotency_key
+             WHERE key = %s AND user_id = %s AND endpoint = %s
+        """, [key, self.env.uid, endpoint])
+
+    @api.model
+    def _cron_sweep_expired(self, batch_size=10000):
+        """Delete the expired keys in batches"""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        total = 0
+        while True:
+            self.env.cr.execute("""
+                DELETE FROM marketplace_idempotency_key
+                 WHERE id IN (
+                        SELECT id
+                          FROM marketplace_idempotency_key
+                         WHERE expiry_date < (now() AT TIME ZONE 'UTC')
+                         LIMIT %s
+                 )
+            """, [batch_size])
+            deleted = self.env.cr.rowcount
+            total += deleted
+            if auto_commit:
+                self.env.cr.commit()
+            if deleted < batch_size:
+                break
+        self.invalidate_model()
+        _logger.info('Deleted %d expired idempotency key(s)', total)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+import logging
+import threading
+
+_logger = logging.getLogger(__name__)
+
+
+class MarketplaceImageVariantMixin(models.AbstractModel):
+    """
+    Resized variants of uploaded images (vendor logos, category images).
+    Changed images are flagged and resized in the background by a cron,
+    so uploads stay fast and catalog pages never serve the originals.
+    """
+    _name = 'marketplace.image.variant.mixin'
+    _description = 'Marketplace Image Variants'
+
+    # {source field: {size: variant field}}, variant fields are Image fields
+    # declared with the matching max_width/max_height
+    _image_variants = {}
+
+    image_variants_pending = fields.Boolean(
+        string='Image Variants Pending',
+        readonly=True,
+        copy=False,
+        help="Set when an image changed and its resized variants must be regenerated"
+    )
+
+    def init(self):
+        super().init()
+        if self._abstract:
+            return
+        create_index(self.env.cr, f'{self._table}_image_variants_pending_index', self._table,
+                     ['id'], where='image_variants_pending')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if any(vals.get(source) for source in self._image_variants):
+                vals['image_variants_pending'] = True
+        records = super().create(vals_list)
+        if any(vals.get('image_variants_pending') for vals in vals_list):
+            self._trigger_image_variants()
+        return records
+
+    def write(self, vals):
+        sources = [source for source in self._image_variants if source in vals]
+        if sources:
+            vals = dict(vals)
+            for source in sources:
+                if vals[source]:
+                    vals['image_variants_pending'] = True
+                else:
+                    # Removed images lose their variants right away
+                    vals.update(dict.fromkeys(self._image_variants[source].values(), False))
+        res = super().write(vals)
+        if vals.get('image_variants_pending'):
+            self._trigger_image_variants()
+        return res
+
+    def _trigger_image_variants(self):
+        cron = self.env.ref('odoo_marketplace.ir_cron_generate_image_variants', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    def _generate_image_variants(self):
+        """Resize the source images of the records into their variant fields"""
+        for record in self:
+            vals = {'image_variants_pending': False}
+            for source, variants in self._image_variants.items():
+                # Image fields resize the written value to their maximum size
+                vals.update(dict.fromkeys(variants.values(), record[source] or False))
+            try:
+                with self.env.cr.savepoint():
+                    record.write(vals)
+            except Exception:
+                _logger.exception('Could not generate the image variants of %s', record)
+                record.write({'image_variants_pending': False})
+
+    @api.model
+    def _cron_generate_image_variants(self, batch_size=50):
+        """Generate the pending image variants of every model using the mixin"""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        for model_name in self.env.registry.descendants([self._name], '_inherit'):
+            Model = self.env[model_name]
+            if Model._abstract:
+                continue
+            while True:
+                records = Model.with_context(active_test=False).search(
+                    [('image_variants_pending', '=', True)], limit=batch_size
+                )
+                if not records:
+                    break
+                records._generate_image_variants()
+                if auto_commit:
+                    self.env.cr.commit()
+                self.env.invalidate_all()
+                _logger.info('Generated image variants of %d %s record(s)', len(records), model_name)
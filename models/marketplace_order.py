@@ -1,11 +1,30 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+from odoo import models, fields, api, _, Command
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools.sql import create_index
+from collections import defaultdict
 import logging
+import threading
 
 _logger = logging.getLogger(__name__)
 
+# Order states counted in marketplace.vendor.order_count
+ORDER_COUNTED_STATES = ['confirmed', 'processing', 'shipped', 'delivered', 'done']
+# Orders holding stock that has not left the warehouse yet
+ORDER_RESERVED_STATES = ['confirmed', 'processing']
+
+# Fulfilment transitions: action -> (allowed source states, target state)
+FULFILMENT_TRANSITIONS = {
+    'process': (['confirmed'], 'processing'),
+    'ship': (['confirmed', 'processing'], 'shipped'),
+    'deliver': (['shipped'], 'delivered'),
+    'done': (['delivered'], 'done'),
+}
+
+# Invoice consolidation, set in the odoo_marketplace.invoice_grouping parameter
+INVOICE_GROUPINGS = ['customer', 'vendor_period']
+
 class MarketplaceOrder(models.Model):
     """Customer orders in marketplace"""
     _name = 'marketplace.order'
@@ -30,6 +49,7 @@ class MarketplaceOrder(models.Model):
     order_date = fields.Datetime(string='Order Date', required=True, 
                                  default=fields.Datetime.now, tracking=True)
     confirmed_date = fields.Datetime(string='Confirmed Date', readonly=True)
+    shipped_date = fields.Datetime(string='Shipped Date', readonly=True)
     delivered_date = fields.Datetime(string='Delivered Date', readonly=True)
     cancelled_date = fields.Datetime(string='Cancelled Date', readonly=True)
     
@@ -90,14 +110,24 @@ class MarketplaceOrder(models.Model):
         ('name_unique', 'UNIQUE(name)', 'Order reference must be unique!'),
     ]
 
-    @api.model
-    def create(self, vals):
-        if vals.get('name', '/') == '/':
-            vals['name'] = self.env['ir.sequence'].next_by_code('marketplace.order') or '/'
+    def init(self):
+        # Completed orders waiting for their invoice, scanned by the invoicing cron
+        create_index(self.env.cr, 'marketplace_order_to_invoice_index', self._table,
+                     ['id'], where="state = 'done' AND invoice_id IS NULL")
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        pending = [vals for vals in vals_list if vals.get('name', '/') == '/']
+        names = self.env['ir.sequence']._next_batch_by_code('marketplace.order', len(pending))
+        for vals, name in zip(pending, names):
+            vals['name'] = name or '/'
         
-        order = super(MarketplaceOrder, self).create(vals)
-        _logger.info(f'New order created: {order.name}')
-        return order
+        orders = super(MarketplaceOrder, self).create(vals_list)
+        if len(orders) == 1:
+            _logger.info(f'New order created: {orders.name}')
+        else:
+            _logger.info('%d new orders created', len(orders))
+        return orders
 
     @api.depends('order_line_ids.subtotal', 'order_line_ids.tax_amount', 'shipping_cost')
     def _compute_amounts(self):
@@ -107,52 +137,173 @@ class MarketplaceOrder(models.Model):
             order.amount_total = order.amount_untaxed + order.amount_tax + order.shipping_cost
 
     def action_confirm(self):
-        self.ensure_one()
-        if self.state != 'draft':
-            raise UserError(_('Only draft orders can be confirmed'))
+        if len(self) == 1:
+            if self.state != 'draft':
+                raise UserError(_('Only draft orders can be confirmed'))
+            self._reserve_stock()
+            self._action_confirm_reserved()
+            return True
         
-        # Check stock availability
-        for line in self.order_line_ids:
-            if line.product_id.qty_available < line.quantity:
-                raise UserError(_('Insufficient stock for %s') % line.product_id.name)
+        failures = self._confirm_batch()
+        message = _('%d order(s) confirmed.') % (len(self) - len(failures))
+        if failures:
+            orders = self.browse(list(failures))
+            message += '\n\n' + _('Failed orders:') + '\n' + '\n'.join(
+                f'{order.name}: {failures[order.id]}' for order in orders
+            )
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Order Confirmation'),
+                'message': message,
+                'type': 'success' if not failures else 'warning',
+                'sticky': bool(failures),
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            }
+        }
+
+    def _confirm_batch(self, send_emails=True):
+        """Confirm the draft orders that can be, in bulk.
+
+        Returns ``{order_id: error message}`` for the orders left
+        unconfirmed instead of aborting the whole batch.
+        """
+        failures = {
+            order.id: _('Only draft orders can be confirmed')
+            for order in self if order.state != 'draft'
+        }
+        orders, stock_failures = self.filtered(lambda o: o.state == 'draft')._allocate_stock()
+        failures.update(stock_failures)
+        if orders:
+            orders._reserve_stock()
+            orders._action_confirm_reserved(send_emails=send_emails)
+        _logger.info('Confirmed %d order(s), %d failed', len(orders), len(failures))
+        return failures
+
+    def _allocate_stock(self):
+        """Split the orders into the ones whose stock can be reserved and the failures.
+
+        The stock of all the products involved is read (and locked) in one
+        query, then allocated to the orders in id order.
+        """
+        needs = defaultdict(dict)
+        for vals in self._get_stock_move_vals(1, 'order_confirm'):
+            needs[vals['order_id']][vals['product_id']] = vals['quantity']
+        product_ids = sorted({product_id for need in needs.values() for product_id in need})
         
-        # Update stock
-        for line in self.order_line_ids:
-            line.product_id.update_stock(line.quantity, 'subtract')
+        available = {}
+        if product_ids:
+            self.env['marketplace.product'].flush_model(['qty_available'])
+            self.env.cr.execute("""
+                SELECT id, COALESCE(qty_available, 0)
+                  FROM marketplace_product
+                 WHERE id = ANY(%s)
+              ORDER BY id
+                   FOR UPDATE
+            """, [product_ids])
+            available = dict(self.env.cr.fetchall())
         
+        allocated, failures = [], {}
+        for order in self.sorted('id'):
+            need = needs.get(order.id, {})
+            short = [product_id for product_id, quantity in need.items()
+                     if available.get(product_id, 0) < quantity]
+            if short:
+                failures[order.id] = _('Insufficient stock for %s') % ', '.join(
+                    self.env['marketplace.product'].browse(short).mapped('name')
+                )
+                continue
+            for product_id, quantity in need.items():
+                available[product_id] -= quantity
+            allocated.append(order.id)
+        return self.browse(allocated), failures
+
+    def _reserve_stock(self):
+        """Check and reserve the stock of all the order lines at once"""
+        self.env['marketplace.stock.move']._apply_moves(self._get_stock_move_vals(-1, 'order_confirm'))
+
+    def _action_confirm_reserved(self, send_emails=True):
+        """Confirm orders whose stock has already been reserved"""
         self.write({
             'state': 'confirmed',
             'confirmed_date': fields.Datetime.now(),
         })
-        
-        self._send_confirmation_email()
+        self._update_order_counters(1)
         self._create_commission()
-        self.message_post(body=_('Order confirmed'))
+        self._message_log_batch(bodies={order.id: _('Order confirmed') for order in self})
+        if send_emails:
+            self._send_confirmation_email()
 
     def action_process(self):
-        self.ensure_one()
+        self._check_fulfilment_state('process')
         self.write({'state': 'processing'})
-        self.message_post(body=_('Order is being processed'))
+        self._message_log_batch(bodies={order.id: _('Order is being processed') for order in self})
 
-    def action_ship(self):
-        self.ensure_one()
-        self.write({'state': 'shipped'})
+    def action_ship(self, tracking_numbers=None):
+        """Ship the orders, ``tracking_numbers`` optionally maps order ids to tracking numbers"""
+        self._check_fulfilment_state('ship')
+        if tracking_numbers:
+            self._set_tracking_numbers(tracking_numbers)
+        self.write({
+            'state': 'shipped',
+            'shipped_date': fields.Datetime.now(),
+        })
         self._send_shipping_email()
-        self.message_post(body=_('Order shipped'))
+        self._message_log_batch(bodies={order.id: _('Order shipped') for order in self})
 
     def action_deliver(self):
-        self.ensure_one()
+        self._check_fulfilment_state('deliver')
         self.write({
             'state': 'delivered',
             'delivered_date': fields.Datetime.now(),
         })
-        self.message_post(body=_('Order delivered'))
+        self._message_log_batch(bodies={order.id: _('Order delivered') for order in self})
 
     def action_done(self):
-        self.ensure_one()
+        self._check_fulfilment_state('done')
         self.write({'state': 'done'})
-        self._create_invoice()
-        self.message_post(body=_('Order completed'))
+        self._update_sales_counters(1)
+        cron = self.env.ref('odoo_marketplace.ir_cron_create_invoices', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        self._message_log_batch(bodies={order.id: _('Order completed') for order in self})
+
+    def _check_fulfilment_state(self, action):
+        """Raise if any order is not in a source state allowed for ``action``"""
+        source_states, target_state = FULFILMENT_TRANSITIONS[action]
+        invalid = self.filtered(lambda o: o.state not in source_states)
+        if invalid:
+            names = ', '.join(invalid[:10].mapped('name'))
+            if len(invalid) > 10:
+                names += _(' and %d more') % (len(invalid) - 10)
+            raise UserError(_('These orders cannot be set to %s: %s') % (
+                dict(self._fields['state']._description_selection(self.env))[target_state], names
+            ))
+
+    def _set_tracking_numbers(self, tracking_numbers):
+        """Set the tracking numbers of ``{order_id: tracking number}`` in one statement.
+
+        Only the orders of ``self`` can be updated, the raw UPDATE bypasses the
+        ORM so the access rights are checked here.
+        """
+        tracking_numbers = {int(order_id): number for order_id, number in tracking_numbers.items()}
+        unknown = set(tracking_numbers) - set(self.ids)
+        if unknown:
+            raise UserError(_('Tracking numbers can only be set on the shipped orders (unexpected ids: %s)')
+                            % ', '.join(map(str, sorted(unknown))))
+        self.check_access_rights('write')
+        self.check_access_rule('write')
+        orders = self.browse(list(tracking_numbers))
+        orders.flush_recordset(['tracking_number'])
+        self.env.cr.execute("""
+            UPDATE marketplace_order o
+               SET tracking_number = t.tracking_number
+              FROM unnest(%s::int[], %s::varchar[]) AS t(id, tracking_number)
+             WHERE o.id = t.id
+        """, [orders.ids, [tracking_numbers[order_id] for order_id in orders.ids]])
+        orders.invalidate_recordset(['tracking_number'])
+        orders.modified(['tracking_number'])
 
     def action_cancel(self):
         self.ensure_one()
@@ -160,9 +311,13 @@ class MarketplaceOrder(models.Model):
             raise UserError(_('Cannot cancel completed or cancelled orders'))
         
         # Restore stock
-        if self.state in ['confirmed', 'processing']:
-            for line in self.order_line_ids:
-                line.product_id.update_stock(line.quantity, 'add')
+        if self.state in ORDER_RESERVED_STATES:
+            StockMove = self.env['marketplace.stock.move']
+            stock_moves = self._get_stock_move_vals(1, 'order_cancel')
+            StockMove._apply_moves(stock_moves)
+        
+        if self.state in ORDER_COUNTED_STATES:
+            self._update_order_counters(-1)
         
         self.write({
             'state': 'cancelled',
@@ -170,34 +325,295 @@ class MarketplaceOrder(models.Model):
         })
         self.message_post(body=_('Order cancelled'))
 
+    @api.model
+    def _prepare_checkout_vals(self, customer, lines, shipping_address_id=None, payment_method='card'):
+        """Validate a cart and return the values of one order per vendor.
+
+        ``lines`` is a list of ``{'product_id': id, 'quantity': qty}``. All
+        the products are fetched in one query and must be published.
+        """
+        quantities = defaultdict(float)
+        for line in lines:
+            try:
+                product_id = int(line['product_id'])
+                quantity = float(line.get('quantity', 1))
+            except (KeyError, TypeError, ValueError):
+                raise UserError(_('Invalid order line: %s') % line)
+            if quantity <= 0:
+                raise UserError(_('Quantity must be positive'))
+            quantities[product_id] += quantity
+        if not quantities:
+            raise UserError(_('No order lines provided'))
+        
+        products = self.env['marketplace.product'].search_fetch([
+            ('id', 'in', list(quantities)),
+            ('state', '=', 'published'),
+        ], ['name', 'vendor_id', 'discount_price'])
+        products_by_id = {product.id: product for product in products}
+        missing = [product_id for product_id in quantities if product_id not in products_by_id]
+        if missing:
+            raise UserError(_('Unavailable product(s): %s') % ', '.join(map(str, missing)))
+        
+        if shipping_address_id:
+            shipping_address = self.env['res.partner'].browse(int(shipping_address_id)).exists()
+            if shipping_address.commercial_partner_id != customer.commercial_partner_id:
+                raise UserError(_('Invalid shipping address'))
+        
+        vendor_lines = defaultdict(list)
+        for product_id, quantity in quantities.items():
+            product = products_by_id[product_id]
+            vendor_lines[product.vendor_id.id].append(Command.create({
+                'product_id': product.id,
+                'product_name': product.name,
+                'quantity': quantity,
+                'price_unit': product.discount_price,
+            }))
+        
+        return [{
+            'customer_id': customer.id,
+            'vendor_id': vendor_id,
+            'order_line_ids': order_lines,
+            'shipping_address_id': int(shipping_address_id) if shipping_address_id else False,
+            'payment_method': payment_method,
+        } for vendor_id, order_lines in vendor_lines.items()]
+
+    @api.model
+    def _checkout(self, customer, lines, shipping_address_id=None, payment_method='card'):
+        """Create and confirm the orders of a multi-vendor cart in one transaction.
+
+        All vendor orders are created in one batch and their stock is
+        reserved in one locked update; nothing is kept if any step fails.
+        """
+        vals_list = self._prepare_checkout_vals(customer, lines, shipping_address_id, payment_method)
+        with self.env.cr.savepoint():
+            orders = self.create(vals_list)
+            orders._reserve_stock()
+            orders._action_confirm_reserved()
+        return orders
+
     def _create_commission(self):
-        """Create commission record"""
-        self.ensure_one()
-        if not self.commission_id and self.vendor_id:
-            vals = {
-                'order_id': self.id,
-                'vendor_id': self.vendor_id.id,
-                'order_amount': self.amount_total,
-            }
-            commission = self.env['marketplace.commission'].create(vals)
-            self.commission_id = commission.id
+        """Create the missing commission records in one batch"""
+        orders = self.filtered(lambda o: not o.commission_id and o.vendor_id)
+        if not orders:
+            return
+        commissions = self.env['marketplace.commission'].create([{
+            'order_id': order.id,
+            'vendor_id': order.vendor_id.id,
+            'order_amount': order.amount_total,
+        } for order in orders])
+        
+        # Link all commissions in one statement instead of one UPDATE per order
+        self.flush_model(['commission_id'])
+        self.env.cr.execute("""
+            UPDATE marketplace_order o
+               SET commission_id = c.commission_id
+              FROM unnest(%s::int[], %s::int[]) AS c(id, commission_id)
+             WHERE o.id = c.id
+        """, [orders.ids, commissions.ids])
+        orders.invalidate_recordset(['commission_id'])
+        orders.modified(['commission_id'])
+
+    def _get_stock_move_vals(self, sign, reason):
+        """Return the ledger moves for the order lines, one per order and product"""
+        quantities = defaultdict(float)
+        for line in self.order_line_ids:
+            quantities[(line.order_id.id, line.product_id.id)] += line.quantity
+        return [{
+            'product_id': product_id,
+            'order_id': order_id,
+            'quantity': sign * quantity,
+            'reason': reason,
+        } for (order_id, product_id), quantity in quantities.items()]
+
+    def _update_order_counters(self, sign):
+        """Shift the vendors' order counter by ``sign`` for each order"""
+        deltas = defaultdict(lambda: defaultdict(int))
+        for order in self:
+            deltas[order.vendor_id.id]['order_count'] += sign
+        self.env['marketplace.vendor']._increment_counters(deltas)
+
+    def _update_sales_counters(self, sign):
+        """Add (sign=1) or remove (sign=-1) the orders from the vendor and product sales counters"""
+        vendor_deltas = defaultdict(lambda: defaultdict(float))
+        product_deltas = defaultdict(lambda: defaultdict(float))
+        for order in self:
+            vendor_deltas[order.vendor_id.id]['total_sales'] += sign * order.amount_total
+            for line in order.order_line_ids:
+                product_delta = product_deltas[line.product_id.id]
+                product_delta['sales_count'] += sign
+                product_delta['total_sold_qty'] += sign * line.quantity
+                product_delta['total_revenue'] += sign * line.subtotal
+        self.env['marketplace.vendor']._increment_counters(vendor_deltas)
+        self.env['marketplace.product']._increment_counters(product_deltas)
+
+    def action_create_invoices(self):
+        """Invoice the selected completed orders and open the invoices"""
+        invoices = self._create_invoice()
+        if not invoices:
+            raise UserError(_('None of the selected orders is done and waiting for an invoice'))
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Invoices'),
+            'res_model': 'account.move',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', invoices.ids)],
+        }
+
+    @api.model
+    def _cron_create_invoices(self, batch_size=500):
+        """Invoice the completed orders, committing after each batch of invoices.
 
-    def _create_invoice(self):
-        """Create invoice"""
-        # Implementation would create account.move
-        pass
+        With the ``vendor_period`` grouping only the orders of past months are
+        invoiced, so that each period ends up on a single invoice.
+        """
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        grouping = self._get_invoice_grouping()
+        # Orders without a currency cannot be invoiced, see _prepare_invoice_vals
+        domain = [('state', '=', 'done'), ('invoice_id', '=', False), ('currency_id', '!=', False)]
+        if grouping == 'vendor_period':
+            domain.append(('order_date', '<', fields.Date.start_of(fields.Date.today(), 'month')))
+        orders = self.search_fetch(domain, ['customer_id', 'vendor_id', 'currency_id', 'order_date'],
+                                   order='id')
+
+        # Chunks never split a group, so each group still gets one invoice
+        chunk = []
+        groups = list(orders._group_for_invoice(grouping).values())
+        for index, order_ids in enumerate(groups):
+            chunk.extend(order_ids)
+            if len(chunk) < batch_size and index < len(groups) - 1:
+                continue
+            self.browse(chunk)._create_invoice(grouping)
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+            chunk = []
+
+    @api.model
+    def _get_invoice_grouping(self):
+        grouping = self.env['ir.config_parameter'].sudo().get_param(
+            'odoo_marketplace.invoice_grouping', 'customer'
+        )
+        return grouping if grouping in INVOICE_GROUPINGS else 'customer'
+
+    def _group_for_invoice(self, grouping):
+        """Return ``{group key: [order ids]}``, one invoice is created per group"""
+        groups = defaultdict(list)
+        for order in self:
+            key = (order.customer_id.id, order.currency_id.id)
+            if grouping == 'vendor_period':
+                key += (order.vendor_id.id, fields.Date.start_of(order.order_date, 'month'))
+            groups[key].append(order.id)
+        return groups
+
+    def _create_invoice(self, grouping=None):
+        """Create the customer invoices of the completed orders not invoiced yet.
+
+        The orders are consolidated according to ``grouping`` (see
+        INVOICE_GROUPINGS), the invoices are created in one batch and linked
+        to their orders in one statement. Returns the invoices.
+        """
+        orders = self.filtered(lambda o: o.state == 'done' and not o.invoice_id)
+        if not orders:
+            return self.env['account.move']
+        groups = orders._group_for_invoice(grouping or self._get_invoice_grouping())
+
+        # Read all the lines and their products up front
+        lines = self.env['marketplace.order.line'].search_fetch(
+            [('order_id', 'in', orders.ids)],
+            ['order_id', 'product_id', 'product_name', 'quantity', 'price_unit', 'discount'],
+        )
+        lines.product_id.product_tmpl_id.product_variant_id
+        lines_by_order = defaultdict(list)
+        for line in lines:
+            lines_by_order[line.order_id.id].append(line)
+
+        journal = self.env['account.journal'].search([
+            ('type', '=', 'sale'),
+            ('company_id', '=', self.env.company.id),
+        ], limit=1)
+        if not journal.default_account_id:
+            raise UserError(_('Set a sales journal with a default income account on the company %s '
+                              'to invoice the orders') % self.env.company.name)
+
+        group_ids = list(groups.values())
+        invoices = self.env['account.move'].create([
+            self.browse(order_ids)._prepare_invoice_vals(lines_by_order, journal)
+            for order_ids in group_ids
+        ])
+
+        order_ids, invoice_ids = [], []
+        for invoice, ids in zip(invoices, group_ids):
+            order_ids.extend(ids)
+            invoice_ids.extend([invoice.id] * len(ids))
+        self.flush_model(['invoice_id'])
+        self.env.cr.execute("""
+            UPDATE marketplace_order o
+               SET invoice_id = i.invoice_id
+              FROM unnest(%s::int[], %s::int[]) AS i(id, invoice_id)
+             WHERE o.id = i.id
+        """, [order_ids, invoice_ids])
+        orders.invalidate_recordset(['invoice_id'])
+        orders.modified(['invoice_id'])
+
+        _logger.info('Created %d invoice(s) for %d order(s)', len(invoices), len(orders))
+        return invoices
+
+    def _prepare_invoice_vals(self, lines_by_order, journal):
+        """Values of the invoice of the orders, with one section per order.
+
+        Orders are priced without taxes (their amount_tax is always 0), so the
+        invoice lines carry no tax either and the invoice total matches the
+        order totals. Shipping is booked on the income account of ``journal``.
+        """
+        currency = self.currency_id
+        if len(currency) != 1 or not all(order.currency_id for order in self):
+            raise UserError(_('The orders %s must all have the same currency to be invoiced together')
+                            % ', '.join(self.mapped('name')))
+        invoice_lines = []
+        for order in self:
+            invoice_lines.append(Command.create({
+                'display_type': 'line_section',
+                'name': order.name,
+            }))
+            for line in lines_by_order[order.id]:
+                invoice_lines.append(Command.create({
+                    'product_id': line.product_id.product_tmpl_id.product_variant_id.id,
+                    'name': line.product_name,
+                    'quantity': line.quantity,
+                    'price_unit': line.price_unit,
+                    'discount': line.discount,
+                    'tax_ids': [Command.clear()],
+                }))
+            if order.shipping_cost:
+                invoice_lines.append(Command.create({
+                    'name': _('Shipping (%s)') % order.name,
+                    'quantity': 1,
+                    'price_unit': order.shipping_cost,
+                    'account_id': journal.default_account_id.id,
+                    'tax_ids': [Command.clear()],
+                }))
+        return {
+            'move_type': 'out_invoice',
+            'journal_id': journal.id,
+            'partner_id': self[0].customer_id.id,
+            'currency_id': currency.id,
+            'invoice_origin': ', '.join(self.mapped('name')),
+            'invoice_line_ids': invoice_lines,
+        }
 
     def _send_confirmation_email(self):
+        """Queue the confirmation emails of the orders"""
         template = self.env.ref('odoo_marketplace.email_template_order_confirmation', 
                                 raise_if_not_found=False)
-        if template:
-            template.send_mail(self.id, force_send=True)
+        if template and self:
+            template.send_mail_batch(self.ids, force_send=False)
 
     def _send_shipping_email(self):
+        """Queue the shipping emails of the orders"""
         template = self.env.ref('odoo_marketplace.email_template_order_shipped',
                                 raise_if_not_found=False)
-        if template:
-            template.send_mail(self.id, force_send=True)
+        if template and self:
+            template.send_mail_batch(self.ids, force_send=False)
 
 
 class MarketplaceOrderLine(models.Model):
@@ -211,7 +627,7 @@ class MarketplaceOrderLine(models.Model):
     sequence = fields.Integer(string='Sequence', default=10)
     
     product_id = fields.Many2one('marketplace.product', string='Product', 
-                                 required=True, ondelete='restrict')
+                                 required=True, ondelete='restrict', index=True)
     product_name = fields.Char(string='Description', required=True)
     
     quantity = fields.Float(string='Quantity', required=True, default=1.0, 
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.tools.sql import create_index
+import logging
+import threading
+
+_logger = logging.getLogger(__name__)
+
+
+class MarketplaceOrderConfirmJob(models.Model):
+    """
+    Background confirmation of large order selections.
+    A cron confirms the orders in committed chunks and stores the result
+    of each order, so an interrupted job resumes where it stopped.
+    """
+    _name = 'marketplace.order.confirm.job'
+    _description = 'Marketplace Order Confirmation Job'
+    _order = 'id desc'
+
+    name = fields.Char(
+        string='Name',
+        required=True,
+        readonly=True,
+        default=lambda self: _('Order Confirmation %s') % fields.Datetime.to_string(fields.Datetime.now())
+    )
+    user_id = fields.Many2one('res.users', string='Requested By', readonly=True,
+                              default=lambda self: self.env.user)
+    send_emails = fields.Boolean(string='Send Confirmation Emails', default=True, readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, readonly=True)
+    message = fields.Text(string='Error', readonly=True)
+    line_ids = fields.One2many('marketplace.order.confirm.job.line', 'job_id',
+                               string='Orders', readonly=True)
+    order_count = fields.Integer(string='Orders', readonly=True)
+    confirmed_count = fields.Integer(string='Confirmed', readonly=True)
+    failed_count = fields.Integer(string='Failed', readonly=True)
+    date_done = fields.Datetime(string='Completed On', readonly=True)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            vals['order_count'] = len(vals.get('line_ids', []))
+        jobs = super(MarketplaceOrderConfirmJob, self).create(vals_list)
+        cron = self.env.ref('odoo_marketplace.ir_cron_process_order_confirm_jobs',
+                            raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return jobs
+
+    @api.model
+    def _cron_process_jobs(self, chunk_size=200):
+        """Process the unfinished jobs as their requester, committing after each chunk.
+
+        A job raising an error is marked as failed, the chunks committed
+        before the error are kept.
+        """
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        for job in self.search([('state', 'in', ['pending', 'running'])], order='id'):
+            try:
+                job.with_user(job.user_id or self.env.user)._process(chunk_size, auto_commit)
+            except Exception as e:
+                if not auto_commit:
+                    raise
+                self.env.cr.rollback()
+                self.env.invalidate_all()
+                _logger.exception('Order confirmation job %s failed', job.id)
+                job.write({
+                    'state': 'failed',
+                    'message': str(e),
+                    'date_done': fields.Datetime.now(),
+                })
+                self.env.cr.commit()
+
+    def _process(self, chunk_size, auto_commit):
+        self.ensure_one()
+        self.state = 'running'
+        Line = self.env['marketplace.order.confirm.job.line']
+        while True:
+            lines = Line.search([
+                ('job_id', '=', self.id),
+                ('state', '=', 'pending'),
+            ], order='id', limit=chunk_size)
+            if not lines:
+                break
+            failures = self._confirm_chunk(lines.order_id)
+            self._record_results(lines, failures)
+            # The orders and their results are committed together
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+
+        self.write({'state': 'done', 'date_done': fields.Datetime.now()})
+        _logger.info('Order confirmation job %s done: %d confirmed, %d failed',
+                     self.id, self.confirmed_count, self.failed_count)
+
+    def _confirm_chunk(self, orders):
+        """Confirm a chunk of orders, return ``{order_id: error message}``"""
+        try:
+            with self.env.cr.savepoint():
+                return orders._confirm_batch(send_emails=self.send_emails)
+        except Exception:
+            # Retry order by order to isolate the ones that break the chunk
+            failures = {}
+            for order in orders:
+                try:
+                    with self.env.cr.savepoint():
+                        failures.update(order._confirm_batch(send_emails=self.send_emails))
+                except Exception as e:
+                    failures[order.id] = str(e)
+            return failures
+
+    def _record_results(self, lines, failures):
+        failed = lines.filtered(lambda l: l.order_id.id in failures)
+        (lines - failed).write({'state': 'confirmed'})
+        if failed:
+            self.env.cr.execute("""
+                UPDATE marketplace_order_confirm_job_line l
+                   SET state = 'failed', message = f.message
+                  FROM unnest(%s::int[], %s::varchar[]) AS f(id, message)
+                 WHERE l.id = f.id
+            """, [failed.ids, [failures[line.order_id.id] for line in failed]])
+            failed.invalidate_recordset(['state', 'message'])
+        self.write({
+            'confirmed_count': self.confirmed_count + len(lines) - len(failed),
+            'failed_count': self.failed_count + len(failed),
+        })
+
+
+class MarketplaceOrderConfirmJobLine(models.Model):
+    """Result of the confirmation of one order by a job"""
+    _name = 'marketplace.order.confirm.job.line'
+    _description = 'Marketplace Order Confirmation Job Line'
+    _order = 'id'
+    _log_access = False
+
+    job_id = fields.Many2one('marketplace.order.confirm.job', string='Job', required=True,
+                             ondelete='cascade')
+    order_id = fields.Many2one('marketplace.order', string='Order', required=True,
+                               ondelete='cascade')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('confirmed', 'Confirmed'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True)
+    message = fields.Char(string='Message')
+
+    def init(self):
+        create_index(self.env.cr, 'marketplace_order_confirm_job_line_job_state_index',
+                     self._table, ['job_id', 'state', 'id'])
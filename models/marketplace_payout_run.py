@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class MarketplacePayoutRun(models.Model):
+    """
+    Platform-wide payout run: pays out the confirmed commissions of every
+    eligible vendor up to a cutoff date in one pass.
+    """
+    _name = 'marketplace.payout.run'
+    _description = 'Marketplace Payout Run'
+    _inherit = ['mail.thread']
+    _order = 'id desc'
+
+    name = fields.Char(
+        string='Name',
+        required=True,
+        default=lambda self: _('Payout Run %s') % fields.Date.to_string(fields.Date.context_today(self))
+    )
+    cutoff_date = fields.Date(
+        string='Cutoff Date',
+        required=True,
+        default=fields.Date.context_today,
+        help="Confirmed commissions created up to this date are paid out"
+    )
+    payout_date = fields.Date(string='Payout Date', required=True, default=fields.Date.context_today)
+    payment_method = fields.Selection([
+        ('bank', 'Bank Transfer'),
+        ('check', 'Check'),
+        ('cash', 'Cash'),
+    ], string='Payment Method', default='bank', required=True)
+    minimum_amount = fields.Monetary(
+        string='Minimum Payout',
+        currency_field='currency_id',
+        default=lambda self: float(self.env['ir.config_parameter'].sudo().get_param(
+            'odoo_marketplace.minimum_payout_amount', 0.0
+        )),
+        help="Vendors owed less than this amount, or less than their own minimum payout, "
+             "are carried over to the next run"
+    )
+    currency_id = fields.Many2one('res.currency', string='Currency',
+                                  default=lambda self: self.env.company.currency_id)
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Generated'),
+    ], string='Status', default='draft', required=True, readonly=True, tracking=True)
+
+    payout_ids = fields.One2many('marketplace.payout', 'run_id', string='Payouts', readonly=True)
+    payout_count = fields.Integer(string='Payouts', compute='_compute_totals')
+    amount_total = fields.Monetary(string='Total Amount', compute='_compute_totals',
+                                   currency_field='currency_id')
+
+    @api.depends('payout_ids.amount')
+    def _compute_totals(self):
+        totals = {}
+        if self.ids:
+            totals = {
+                run.id: (count, amount)
+                for run, count, amount in self.env['marketplace.payout']._read_group(
+                    [('run_id', 'in', self.ids)],
+                    ['run_id'], ['__count', 'amount:sum'],
+                )
+            }
+        for run in self:
+            run.payout_count, run.amount_total = totals.get(run._origin.id, (0, 0.0))
+
+    def action_generate(self):
+        """Create the payouts of all the eligible vendors"""
+        self.ensure_one()
+        if self.state != 'draft':
+            raise UserError(_('This payout run has already been generated'))
+
+        payouts = self.env['marketplace.payout']._create_payouts(
+            self.cutoff_date,
+            minimum_amount=self.minimum_amount,
+            vals={
+                'run_id': self.id,
+                'payout_date': self.payout_date,
+                'payment_method': self.payment_method,
+            },
+        )
+        self.state = 'done'
+        self.message_post(body=_('%d payout(s) generated') % len(payouts))
+        _logger.info('Payout run %s generated %d payout(s)', self.id, len(payouts))
+        return self.action_view_payouts()
+
+    def action_export_bank_file(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Export Bank File'),
+            'res_model': 'marketplace.payout.export.wizard',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {'default_run_id': self.id},
+        }
+
+    def action_view_payouts(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Payouts'),
+            'res_model': 'marketplace.payout',
+            'view_mode': 'tree,form',
+            'domain': [('run_id', '=', self.id)],
+        }
@@ -2,10 +2,25 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools.sql import create_index
+from collections import defaultdict
+from datetime import datetime, timedelta
 import logging
+import threading
+import time
+
+from .marketplace_order import ORDER_RESERVED_STATES
 
 _logger = logging.getLogger(__name__)
 
+# Index of this module on the stock_quant table of the stock module
+STOCK_QUANT_WRITE_DATE_INDEX = 'marketplace_stock_quant_write_date_index'
+
+# Per-worker cache of facet counts: {key: (expiry, facets)}
+FACET_CACHE_TTL = 60
+FACET_CACHE_SIZE = 1000
+_facet_cache = {}
+
 
 class MarketplaceProduct(models.Model):
     """
@@ -14,8 +29,14 @@ class MarketplaceProduct(models.Model):
     """
     _name = 'marketplace.product'
     _description = 'Marketplace Product'
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'image.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'image.mixin',
+                'marketplace.rating.mixin']
     _order = 'create_date desc'
+    _rating_review_field = 'product_id'
+    # Served image sizes, kept in sync on write by image.mixin
+    _image_variants = {
+        'image_1920': {128: 'image_128', 256: 'image_256', 512: 'image_512', 1024: 'image_1024'},
+    }
 
     # Basic Information
     name = fields.Char(string='Product Name', required=True, tracking=True, index=True)
@@ -43,6 +64,7 @@ class MarketplaceProduct(models.Model):
         'product.template',
         string='Product Template',
         ondelete='restrict',
+        index='btree_not_null',
         help="Link to standard Odoo product"
     )
     
@@ -114,6 +136,12 @@ class MarketplaceProduct(models.Model):
         ('low_stock', 'Low Stock'),
         ('out_of_stock', 'Out of Stock'),
     ], string='Stock Status', compute='_compute_stock_status', store=True)
+    stock_alert_state = fields.Selection([
+        ('in_stock', 'In Stock'),
+        ('low_stock', 'Low Stock'),
+        ('out_of_stock', 'Out of Stock'),
+    ], string='Alerted Stock Status', default='in_stock', required=True, readonly=True, copy=False,
+        help="Stock status last reported to the vendor by the low stock digest")
     
     # Product Specifications
     weight = fields.Float(string='Weight (kg)', digits=(8, 3))
@@ -160,35 +188,24 @@ class MarketplaceProduct(models.Model):
         string='Reviews'
     )
     
-    # Computed Statistics
+    # Sales Statistics (maintained by the order state transitions)
     sales_count = fields.Integer(
         string='Sales Count',
-        compute='_compute_sales_stats',
-        store=True
+        readonly=True,
+        copy=False
     )
     total_sold_qty = fields.Float(
         string='Total Sold Quantity',
-        compute='_compute_sales_stats',
-        store=True,
+        readonly=True,
+        copy=False,
         digits='Product Unit of Measure'
     )
     total_revenue = fields.Monetary(
         string='Total Revenue',
-        compute='_compute_sales_stats',
-        store=True,
+        readonly=True,
+        copy=False,
         currency_field='currency_id'
     )
-    average_rating = fields.Float(
-        string='Average Rating',
-        compute='_compute_rating',
-        store=True,
-        digits=(3, 2)
-    )
-    review_count = fields.Integer(
-        string='Review Count',
-        compute='_compute_rating',
-        store=True
-    )
     
     # Dates
     published_date = fields.Datetime(string='Published Date', readonly=True)
@@ -203,28 +220,95 @@ class MarketplaceProduct(models.Model):
     internal_notes = fields.Text(string='Internal Notes')
     rejection_reason = fields.Text(string='Rejection Reason')
     
+    # Search
+    search_text = fields.Text(
+        string='Search Text',
+        compute='_compute_search_text',
+        store=True,
+        help="Name, code, short description and tags, indexed for full-text search"
+    )
+    
     _sql_constraints = [
         ('code_unique', 'UNIQUE(code)', 'Product code must be unique!'),
         ('list_price_positive', 'CHECK(list_price >= 0)', 'Sale price must be positive!'),
         ('qty_positive', 'CHECK(qty_available >= 0)', 'Quantity cannot be negative!'),
     ]
 
-    @api.model
-    def create(self, vals):
-        """Generate sequence code"""
-        if vals.get('code', '/') == '/':
-            vals['code'] = self.env['ir.sequence'].next_by_code('marketplace.product') or '/'
+    def init(self):
+        create_index(self.env.cr, 'marketplace_product_search_text_tsv_index', self._table,
+                     ["to_tsvector('simple', COALESCE(search_text, ''))"], method='gin')
+        if self.env.registry.has_trigram:
+            # Built on the plain column, as queried by _search_match_sql: with
+            # unaccent enabled, index='trigram' would index unaccent(search_text)
+            # and the ranked search could not use it
+            create_index(self.env.cr, 'marketplace_product_search_text_trgm_index', self._table,
+                         ['search_text gin_trgm_ops'], method='gin')
+        # Low stock digest: products whose status differs from the last alerted one.
+        # Both columns are filled first, a NULL would match the index on every run.
+        self.env.cr.execute("""
+            UPDATE marketplace_product
+               SET stock_status = CASE
+                       WHEN COALESCE(qty_available, 0) <= 0 THEN 'out_of_stock'
+                       WHEN COALESCE(qty_available, 0) <= COALESCE(low_stock_threshold, 0) THEN 'low_stock'
+                       ELSE 'in_stock'
+                   END
+             WHERE stock_status IS NULL
+        """)
+        self.env.cr.execute("""
+            UPDATE marketplace_product
+               SET stock_alert_state = 'in_stock'
+             WHERE stock_alert_state IS NULL
+        """)
+        create_index(self.env.cr, 'marketplace_product_stock_alert_index', self._table,
+                     ['vendor_id'], where="stock_status <> stock_alert_state")
+        # Moderation queue: pending products, oldest first
+        create_index(self.env.cr, 'marketplace_product_pending_queue_index', self._table,
+                     ['create_date', 'id'], where="state = 'pending'")
+        # Incremental stock sync: quants written since the last run. stock_quant
+        # belongs to the stock module, which neither indexes write_date nor
+        # manages indexes it does not declare, so this plain btree under the
+        # module prefix cannot clash with it. Dropped by the uninstall hook.
+        create_index(self.env.cr, STOCK_QUANT_WRITE_DATE_INDEX, 'stock_quant', ['write_date'])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Generate sequence codes"""
+        pending = [vals for vals in vals_list if vals.get('code', '/') == '/']
+        codes = self.env['ir.sequence']._next_batch_by_code('marketplace.product', len(pending))
+        for vals, code in zip(pending, codes):
+            vals['code'] = code or '/'
         
-        product = super(MarketplaceProduct, self).create(vals)
-        _logger.info(f'New product created: {product.code} - {product.name}')
-        return product
+        products = super(MarketplaceProduct, self).create(vals_list)
+        self.env['marketplace.stock.move']._record_moves([{
+            'product_id': product.id,
+            'quantity': product.qty_available,
+            'reason': 'initial',
+        } for product in products])
+        products._sync_stock_from_quants()
+        if len(products) == 1:
+            _logger.info(f'New product created: {products.code} - {products.name}')
+        else:
+            _logger.info('%d new products created', len(products))
+        return products
 
     def write(self, vals):
         """Track state changes"""
         # Handle multi-record writes safely and call state change handler per record
         previous_states = {p.id: p.state for p in self}
+        previous_qty = {p.id: p.qty_available for p in self} if 'qty_available' in vals else {}
         res = super(MarketplaceProduct, self).write(vals)
 
+        if previous_qty:
+            # Manual edits of the quantity are recorded as ledger adjustments
+            self.env['marketplace.stock.move']._record_moves([{
+                'product_id': product.id,
+                'quantity': product.qty_available - previous_qty[product.id],
+                'reason': 'adjustment',
+            } for product in self])
+
+        if 'stock_management' in vals or 'product_tmpl_id' in vals:
+            self._sync_stock_from_quants()
+
         if 'state' in vals:
             # For each record, compare and call handler if changed
             for product in self:
@@ -246,6 +330,8 @@ class MarketplaceProduct(models.Model):
                     'Cannot delete product %s because it has %d sales. '
                     'Please unpublish instead.'
                 ) % (product.name, product.sales_count))
+        # Reviews cascade in SQL, remove them first to update the vendor ratings
+        self.env['marketplace.review'].sudo().search([('product_id', 'in', self.ids)]).unlink()
         return super(MarketplaceProduct, self).unlink()
 
     @api.depends('list_price', 'has_discount', 'discount_percentage')
@@ -271,28 +357,16 @@ class MarketplaceProduct(models.Model):
                 product.stock_status = 'in_stock'
                 product.is_low_stock = False
 
-    @api.depends('order_line_ids', 'order_line_ids.order_id.state')
-    def _compute_sales_stats(self):
-        """Compute sales statistics"""
-        for product in self:
-            completed_lines = product.order_line_ids.filtered(
-                lambda l: l.order_id.state == 'done'
-            )
-            product.sales_count = len(completed_lines)
-            product.total_sold_qty = sum(completed_lines.mapped('quantity'))
-            product.total_revenue = sum(completed_lines.mapped('subtotal'))
-
-    @api.depends('review_ids.rating', 'review_ids.state')
-    def _compute_rating(self):
-        """Compute average rating"""
+    @api.depends('name', 'code', 'short_description', 'tag_ids.name')
+    def _compute_search_text(self):
+        """Concatenate the searchable texts of the product"""
         for product in self:
-            published_reviews = product.review_ids.filtered(lambda r: r.state == 'published')
-            product.review_count = len(published_reviews)
-            
-            if published_reviews:
-                product.average_rating = sum(published_reviews.mapped('rating')) / len(published_reviews)
-            else:
-                product.average_rating = 0.0
+            product.search_text = ' '.join(filter(None, [
+                product.name,
+                product.code,
+                product.short_description,
+                ' '.join(product.tag_ids.mapped('name')),
+            ]))
 
     @api.constrains('discount_percentage')
     def _check_discount_percentage(self):
@@ -326,24 +400,34 @@ class MarketplaceProduct(models.Model):
         self.message_post(body=_('Product submitted for approval'))
 
     def action_approve(self):
-        """Approve product"""
-        self.ensure_one()
-        if self.state != 'pending':
+        """Approve and publish the pending products"""
+        products = self.filtered(lambda p: p.state == 'pending')
+        if not products:
             raise UserError(_('Only pending products can be approved'))
         
-        self.write({
+        # The chatter log below replaces the per-record state tracking
+        products.with_context(tracking_disable=True).write({
             'state': 'published',
             'published_date': fields.Datetime.now(),
         })
         
-        self._create_product_template()
-        self.message_post(body=_('Product approved and published'))
+        products._create_product_template()
+        products._message_log_batch(
+            bodies={product.id: _('Product approved and published') for product in products}
+        )
+        return products._moderation_notification(_('%d product(s) approved and published'), len(self))
 
     def action_reject(self):
-        """Reject product"""
-        self.ensure_one()
-        self.write({'state': 'rejected'})
-        self.message_post(body=_('Product rejected'))
+        """Reject the pending products"""
+        products = self.filtered(lambda p: p.state == 'pending')
+        if not products:
+            raise UserError(_('Only pending products can be rejected'))
+        
+        products.with_context(tracking_disable=True).write({'state': 'rejected'})
+        products._message_log_batch(
+            bodies={product.id: _('Product rejected') for product in products}
+        )
+        return products._moderation_notification(_('%d product(s) rejected'), len(self))
 
     def action_publish(self):
         """Publish product"""
@@ -386,37 +470,421 @@ class MarketplaceProduct(models.Model):
     def update_stock(self, quantity, operation='add'):
         """Update product stock"""
         self.ensure_one()
-        if operation == 'add':
-            self.qty_available += quantity
-        elif operation == 'subtract':
-            if self.qty_available < quantity:
-                raise UserError(_('Insufficient stock for %s') % self.name)
-            self.qty_available -= quantity
-        
-        self.message_post(body=_('Stock %s: %s units') % (operation, quantity))
+        if operation not in ('add', 'subtract'):
+            return
+        self.env['marketplace.stock.move']._apply_moves([{
+            'product_id': self.id,
+            'quantity': quantity if operation == 'add' else -quantity,
+            'reason': 'adjustment',
+        }])
+
+    def action_view_stock_moves(self):
+        """View product stock history"""
+        self.ensure_one()
+        return {
+            'name': _('Stock Moves'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'marketplace.stock.move',
+            'view_mode': 'tree',
+            'domain': [('product_id', '=', self.id)],
+        }
+
+    @api.model
+    def _search_ranked(self, terms, domain=None, limit=20, offset=0):
+        """Search products matching ``terms``, most relevant first.
+
+        Matches use the full-text index on ``search_text`` and, for typo
+        tolerance, trigram word similarity. Without the pg_trgm extension
+        this falls back to an unranked name/code ``ilike`` search.
+
+        :return: tuple (products of the requested page, total match count)
+        """
+        domain = list(domain or [])
+        terms = (terms or '').strip()
+        if not terms or not self.env.registry.has_trigram:
+            if terms:
+                domain += ['|', ('name', 'ilike', terms), ('code', 'ilike', terms)]
+            return self.search(domain, limit=limit, offset=offset), self.search_count(domain)
+
+        where, params = self._search_match_sql(terms, domain)
+        self.env.cr.execute(f"""
+            SELECT p.id, COUNT(*) OVER ()
+              FROM marketplace_product p
+             WHERE {where}
+          ORDER BY ts_rank_cd(to_tsvector('simple', COALESCE(p.search_text, '')),
+                              plainto_tsquery('simple', %s))
+                   + word_similarity(%s, p.search_text) DESC, p.id DESC
+             LIMIT %s OFFSET %s
+        """, [*params, terms, terms, limit, offset])
+        rows = self.env.cr.fetchall()
+
+        if rows:
+            total = rows[0][1]
+        elif offset:
+            self.env.cr.execute(f"SELECT COUNT(*) FROM marketplace_product p WHERE {where}", params)
+            total = self.env.cr.fetchone()[0]
+        else:
+            total = 0
+        return self.browse([row[0] for row in rows]), total
+
+    @api.model
+    def _get_facet_counts(self, domain=None, terms=None):
+        """Count the products matching ``domain`` (and ``terms``) per facet value.
+
+        Category, vendor, stock status, price bucket and rating counts come
+        from a single GROUPING SETS query, tag counts from a second one.
+        Results are cached per worker for FACET_CACHE_TTL seconds so that
+        popular landing pages do not recount on every request.
+        """
+        domain = list(domain or [])
+        terms = (terms or '').strip()
+        cache_key = (self.env.cr.dbname, self.env.uid, repr(domain), terms)
+        cached = _facet_cache.get(cache_key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        bounds = self._get_price_bucket_bounds()
+        if terms and self.env.registry.has_trigram:
+            where, params = self._search_match_sql(terms, domain)
+        else:
+            if terms:
+                domain += ['|', ('name', 'ilike', terms), ('code', 'ilike', terms)]
+            subselect = self._search(domain).subselect()
+            where, params = f'p.id IN ({subselect.code})', list(subselect.params)
+
+        self.flush_model(['category_id', 'vendor_id', 'stock_status', 'discount_price',
+                          'average_rating', 'tag_ids'])
+        self.env.cr.execute(f"""
+            WITH base AS (
+                SELECT p.category_id, p.vendor_id, p.stock_status,
+                       width_bucket(COALESCE(p.discount_price, 0), %s::numeric[]) AS price_bucket,
+                       FLOOR(COALESCE(p.average_rating, 0))::int AS rating_bucket
+                  FROM marketplace_product p
+                 WHERE {where}
+            )
+            SELECT GROUPING(category_id, vendor_id, stock_status, price_bucket, rating_bucket),
+                   category_id, vendor_id, stock_status, price_bucket, rating_bucket, COUNT(*)
+              FROM base
+          GROUP BY GROUPING SETS ((category_id), (vendor_id), (stock_status),
+                                  (price_bucket), (rating_bucket))
+        """, [bounds, *params])
+        rows = self.env.cr.fetchall()
+
+        tag_field = self._fields['tag_ids']
+        self.env.cr.execute(f"""
+            SELECT rel."{tag_field.column2}", COUNT(*)
+              FROM "{tag_field.relation}" rel
+             WHERE rel."{tag_field.column1}" IN (
+                    SELECT p.id FROM marketplace_product p WHERE {where}
+             )
+          GROUP BY rel."{tag_field.column2}"
+        """, params)
+        tag_counts = dict(self.env.cr.fetchall())
+
+        # GROUPING() sets one bit per column that is not part of the row's grouping set
+        categories, vendors, stock, prices, ratings = {}, {}, {}, {}, {}
+        for grouping, category_id, vendor_id, status, price_bucket, rating_bucket, count in rows:
+            if grouping == 0b01111:
+                categories[category_id] = count
+            elif grouping == 0b10111:
+                vendors[vendor_id] = count
+            elif grouping == 0b11011:
+                stock[status] = count
+            elif grouping == 0b11101:
+                prices[price_bucket] = count
+            elif grouping == 0b11110:
+                ratings[rating_bucket] = count
+
+        category_names = {
+            c.id: c.complete_name
+            for c in self.env['marketplace.category'].sudo().browse(list(categories)).exists()
+        }
+        vendor_names = {
+            v.id: v.name
+            for v in self.env['marketplace.vendor'].sudo().browse(list(vendors)).exists()
+        }
+        tag_names = {
+            t.id: t.name
+            for t in self.env['marketplace.product.tag'].sudo().browse(list(tag_counts)).exists()
+        }
+        status_labels = dict(self._fields['stock_status']._description_selection(self.env))
+
+        facets = {
+            'category': [{'id': key, 'name': category_names.get(key), 'count': count}
+                         for key, count in sorted(categories.items(), key=lambda i: -i[1])],
+            'vendor': [{'id': key, 'name': vendor_names.get(key), 'count': count}
+                       for key, count in sorted(vendors.items(), key=lambda i: -i[1])],
+            'tag': [{'id': key, 'name': tag_names.get(key), 'count': count}
+                    for key, count in sorted(tag_counts.items(), key=lambda i: -i[1])],
+            'stock_status': [{'value': key, 'name': status_labels.get(key), 'count': count}
+                             for key, count in stock.items() if key],
+            'price': [{
+                'bucket': key,
+                'min': bounds[key - 1] if key > 0 else None,
+                'max': bounds[key] if key < len(bounds) else None,
+                'count': count,
+            } for key, count in sorted(prices.items())],
+            'rating': [{'value': key, 'count': count}
+                       for key, count in sorted(ratings.items(), reverse=True)],
+        }
+
+        if len(_facet_cache) >= FACET_CACHE_SIZE:
+            _facet_cache.clear()
+        _facet_cache[cache_key] = (time.monotonic() + FACET_CACHE_TTL, facets)
+        return facets
+
+    @api.model
+    def _get_price_bucket_bounds(self):
+        """Return the ascending price boundaries of the price facet"""
+        bounds = self.env['ir.config_parameter'].sudo().get_param(
+            'odoo_marketplace.facet_price_buckets', '0,25,50,100,250,500,1000'
+        )
+        return sorted(float(bound) for bound in bounds.split(',') if bound.strip())
+
+    @api.model
+    def _cron_send_low_stock_digest(self):
+        """Send each vendor one digest of its products that became low or out of stock.
+
+        Products are only reported again once their status changes: the
+        alerted status is remembered and reset when they are restocked.
+        """
+        self.flush_model(['stock_status', 'stock_alert_state', 'vendor_id', 'active'])
+        self.env.cr.execute("""
+            SELECT id, vendor_id, stock_status
+              FROM marketplace_product
+             WHERE stock_status <> stock_alert_state
+               AND active
+        """)
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return
+
+        alerts = defaultdict(list)
+        for product_id, vendor_id, status in rows:
+            if status in ('low_stock', 'out_of_stock'):
+                alerts[vendor_id].append(product_id)
+
+        template = self.env.ref('odoo_marketplace.email_template_vendor_low_stock_digest',
+                                raise_if_not_found=False)
+        if template:
+            for vendor_id, product_ids in alerts.items():
+                template.with_context(
+                    low_stock_products=self.browse(product_ids)
+                ).send_mail(vendor_id, force_send=False)
+
+        # Remember the alerted status, restocked products are reset
+        self.env.cr.execute("""
+            UPDATE marketplace_product p
+               SET stock_alert_state = d.status
+              FROM unnest(%s::int[], %s::varchar[]) AS d(id, status)
+             WHERE p.id = d.id
+        """, [[row[0] for row in rows], [row[2] or 'in_stock' for row in rows]])
+        self.browse([row[0] for row in rows]).invalidate_recordset(['stock_alert_state'])
+        _logger.info('Sent low stock digests to %d vendor(s) for %d product(s)',
+                     len(alerts), sum(len(ids) for ids in alerts.values()))
+
+    @api.model
+    def _cron_sync_stock_quants(self, batch_size=1000):
+        """Sync the automatic products whose stock.quant changed since the last run.
+
+        A quant written by a transaction still open when the watermark is read
+        commits with an older write_date, so every run scans again the last
+        ``odoo_marketplace.stock_quant_sync_overlap`` minutes before the
+        watermark. Syncing a product twice is harmless, its delta is then 0.
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        watermark = ICP.get_param('odoo_marketplace.stock_quant_sync_date')
+        overlap = int(ICP.get_param('odoo_marketplace.stock_quant_sync_overlap', 60))
+        since = (fields.Datetime.to_datetime(watermark) - timedelta(minutes=overlap)
+                 if watermark else datetime(1970, 1, 1))
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+
+        self.env['stock.quant'].flush_model(['write_date'])
+        self.env.cr.execute("SELECT MAX(write_date) FROM stock_quant WHERE write_date > %s", [since])
+        new_watermark = self.env.cr.fetchone()[0]
+        if not new_watermark:
+            return
+
+        self.flush_model(['stock_management', 'product_tmpl_id'])
+        self.env.cr.execute("""
+            SELECT mp.id
+              FROM marketplace_product mp
+             WHERE mp.stock_management = 'automatic'
+               AND mp.product_tmpl_id IN (
+                    SELECT pp.product_tmpl_id
+                      FROM stock_quant q
+                      JOIN product_product pp ON pp.id = q.product_id
+                     WHERE q.write_date > %s
+               )
+          ORDER BY mp.id
+        """, [since])
+        product_ids = [row[0] for row in self.env.cr.fetchall()]
+
+        for start in range(0, len(product_ids), batch_size):
+            self.browse(product_ids[start:start + batch_size])._sync_stock_from_quants()
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+
+        if not watermark or new_watermark > fields.Datetime.to_datetime(watermark):
+            ICP.set_param('odoo_marketplace.stock_quant_sync_date', fields.Datetime.to_string(new_watermark))
+        _logger.info('Synced the stock of %d automatic product(s) from stock quants', len(product_ids))
+
+    def _sync_stock_from_quants(self):
+        """Align the quantity of the automatic products on the unreserved
+        quantity of their internal stock.quant, through ledger moves.
+
+        Confirmed orders do not reserve quants, the quantity they hold until
+        they are shipped is deducted here instead.
+        """
+        products = self.filtered(lambda p: p.stock_management == 'automatic' and p.product_tmpl_id)
+        if not products:
+            return
+
+        self.env['stock.quant'].flush_model(['product_id', 'location_id', 'quantity', 'reserved_quantity'])
+        self.env['marketplace.order'].flush_model(['state'])
+        self.env['marketplace.order.line'].flush_model(['order_id', 'product_id', 'quantity'])
+        products.flush_recordset(['qty_available', 'product_tmpl_id'])
+        # Lock first so that the deltas are computed on the quantities they are applied to
+        self.env.cr.execute(
+            "SELECT id FROM marketplace_product WHERE id = ANY(%s) ORDER BY id FOR UPDATE",
+            [products.ids],
+        )
+        self.env.cr.execute("""
+            SELECT mp.id,
+                   GREATEST(COALESCE(q.quantity, 0) - COALESCE(c.quantity, 0), 0)
+                   - COALESCE(mp.qty_available, 0)
+              FROM marketplace_product mp
+         LEFT JOIN LATERAL (
+                    SELECT SUM(q.quantity - q.reserved_quantity) AS quantity
+                      FROM stock_quant q
+                      JOIN product_product pp ON pp.id = q.product_id
+                      JOIN stock_location l ON l.id = q.location_id
+                     WHERE pp.product_tmpl_id = mp.product_tmpl_id
+                       AND l.usage = 'internal'
+                   ) q ON TRUE
+         LEFT JOIN LATERAL (
+                    SELECT SUM(ol.quantity) AS quantity
+                      FROM marketplace_order_line ol
+                      JOIN marketplace_order o ON o.id = ol.order_id
+                     WHERE ol.product_id = mp.id
+                       AND o.state = ANY(%s)
+                   ) c ON TRUE
+             WHERE mp.id = ANY(%s)
+        """, [ORDER_RESERVED_STATES, products.ids])
+        self.env['marketplace.stock.move']._apply_moves([{
+            'product_id': product_id,
+            'quantity': delta,
+            'reason': 'sync',
+        } for product_id, delta in self.env.cr.fetchall() if delta])
 
     # Private Methods
+    def _search_match_sql(self, terms, domain):
+        """Return the WHERE clause and parameters selecting the products of
+        ``domain`` matching ``terms`` through the full-text or trigram index"""
+        self.flush_model(['search_text'])
+        subselect = self._search(domain).subselect()
+        where = f"""p.id IN ({subselect.code})
+               AND (to_tsvector('simple', COALESCE(p.search_text, '')) @@ plainto_tsquery('simple', %s)
+                    OR %s <%% p.search_text)"""
+        return where, [*subselect.params, terms, terms]
+
+    @api.model
+    def _reconcile_sales_counters(self):
+        """Recompute the sales counters from completed order lines and fix drifted products"""
+        self.env['marketplace.order'].flush_model(['state'])
+        self.env['marketplace.order.line'].flush_model(['order_id', 'product_id', 'quantity', 'subtotal'])
+        self.flush_model(['sales_count', 'total_sold_qty', 'total_revenue'])
+        self.env.cr.execute("""
+            SELECT p.id, p.code, p.sales_count, p.total_sold_qty, p.total_revenue,
+                   COALESCE(s.sales_count, 0), COALESCE(s.total_sold_qty, 0),
+                   COALESCE(s.total_revenue, 0)
+              FROM marketplace_product p
+         LEFT JOIN (
+                SELECT l.product_id,
+                       COUNT(*) AS sales_count,
+                       SUM(l.quantity) AS total_sold_qty,
+                       SUM(l.subtotal) AS total_revenue
+                  FROM marketplace_order_line l
+                  JOIN marketplace_order o ON o.id = l.order_id
+                 WHERE o.state = 'done'
+              GROUP BY l.product_id
+             ) s ON s.product_id = p.id
+             WHERE COALESCE(p.sales_count, 0) != COALESCE(s.sales_count, 0)
+                OR COALESCE(p.total_sold_qty, 0) != COALESCE(s.total_sold_qty, 0)
+                OR COALESCE(p.total_revenue, 0) != COALESCE(s.total_revenue, 0)
+        """)
+
+        deltas = {}
+        drift = []
+        for (product_id, code, sales_count, sold_qty, revenue,
+                real_count, real_qty, real_revenue) in self.env.cr.fetchall():
+            deltas[product_id] = {
+                'sales_count': real_count - (sales_count or 0),
+                'total_sold_qty': real_qty - (sold_qty or 0),
+                'total_revenue': real_revenue - (revenue or 0),
+            }
+            drift.append(_('Product %s: sales %s -> %s, quantity %s -> %s, revenue %s -> %s') % (
+                code, sales_count or 0, real_count, sold_qty or 0, real_qty,
+                revenue or 0, real_revenue,
+            ))
+            _logger.warning(drift[-1])
+
+        self._increment_counters(deltas)
+        return drift
+
     def _handle_state_change(self, old_state, new_state):
         """Handle state changes"""
         for product in self:
             _logger.info(f'Product {product.code} state: {old_state} -> {new_state}')
 
-    def _create_product_template(self):
-        """Create or link to product.template"""
-        self.ensure_one()
-        if not self.product_tmpl_id:
-            vals = {
-                'name': self.name,
-                'list_price': self.list_price,
-                'standard_price': self.cost_price or 0.0,
-                'type': 'product' if self.product_type == 'physical' else 'service',
-                'categ_id': self.category_id.product_categ_id.id if self.category_id.product_categ_id else False,
-                # Use the standard sale description field on product.template
-                'description_sale': self.description or '',
-                'weight': self.weight,
+    def _moderation_notification(self, message, selected_count):
+        """Summarize a bulk moderation action; single-record actions just reload the form"""
+        if selected_count == 1:
+            return True
+        message = message % len(self)
+        skipped = selected_count - len(self)
+        if skipped:
+            message += '\n' + _('%d product(s) skipped because they are not pending') % skipped
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Product Moderation'),
+                'message': message,
+                'type': 'success' if not skipped else 'warning',
+                'sticky': bool(skipped),
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
             }
-            product_tmpl = self.env['product.template'].create(vals)
-            self.product_tmpl_id = product_tmpl.id
+        }
+
+    def _create_product_template(self):
+        """Create the missing product.template of the products in one batch"""
+        products = self.filtered(lambda p: not p.product_tmpl_id)
+        if not products:
+            return
+        
+        templates = self.env['product.template'].create([{
+            'name': product.name,
+            'list_price': product.list_price,
+            'standard_price': product.cost_price or 0.0,
+            'type': 'product' if product.product_type == 'physical' else 'service',
+            'categ_id': product.category_id.product_categ_id.id if product.category_id.product_categ_id else False,
+            # Use the standard sale description field on product.template
+            'description_sale': product.description or '',
+            'weight': product.weight,
+        } for product in products])
+        
+        # Link all templates in one statement instead of one UPDATE per product
+        self.flush_model(['product_tmpl_id'])
+        self.env.cr.execute("""
+            UPDATE marketplace_product p
+               SET product_tmpl_id = t.template_id
+              FROM unnest(%s::int[], %s::int[]) AS t(id, template_id)
+             WHERE p.id = t.id
+        """, [products.ids, templates.ids])
+        products.invalidate_recordset(['product_tmpl_id'])
+        products.modified(['product_tmpl_id'])
 
 
 class MarketplaceProductTag(models.Model):
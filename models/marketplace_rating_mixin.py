@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class MarketplaceRatingMixin(models.AbstractModel):
+    """
+    Rating aggregates for reviewed records (products and vendors).
+    The sums and the per-star histogram are maintained incrementally
+    by marketplace.review, so the average never rescans the reviews.
+    """
+    _name = 'marketplace.rating.mixin'
+    _description = 'Marketplace Rating Aggregates'
+    _inherit = ['marketplace.counter.mixin']
+
+    # Field of marketplace.review pointing to the reviewed record
+    _rating_review_field = None
+
+    rating_sum = fields.Integer(string='Rating Sum', readonly=True, copy=False)
+    rating_count = fields.Integer(string='Rating Count', readonly=True, copy=False)
+    rating_1_count = fields.Integer(string='1 Star Reviews', readonly=True, copy=False)
+    rating_2_count = fields.Integer(string='2 Star Reviews', readonly=True, copy=False)
+    rating_3_count = fields.Integer(string='3 Star Reviews', readonly=True, copy=False)
+    rating_4_count = fields.Integer(string='4 Star Reviews', readonly=True, copy=False)
+    rating_5_count = fields.Integer(string='5 Star Reviews', readonly=True, copy=False)
+
+    average_rating = fields.Float(
+        string='Average Rating',
+        compute='_compute_rating',
+        store=True,
+        digits=(3, 2)
+    )
+    review_count = fields.Integer(
+        string='Review Count',
+        compute='_compute_rating',
+        store=True
+    )
+
+    @api.depends('rating_sum', 'rating_count')
+    def _compute_rating(self):
+        """Derive the average rating from the stored aggregates"""
+        for record in self:
+            record.review_count = record.rating_count
+            if record.rating_count:
+                record.average_rating = record.rating_sum / record.rating_count
+            else:
+                record.average_rating = 0.0
+
+    def _get_rating_histogram(self):
+        """Return the number of published reviews per star: ``{1: n, ..., 5: n}``"""
+        self.ensure_one()
+        return {star: self[f'rating_{star}_count'] for star in range(1, 6)}
+
+    @api.model
+    def _rebuild_rating_aggregates(self):
+        """Recompute the aggregates from the published reviews and fix drifted records"""
+        review_field = self._rating_review_field
+        self.env['marketplace.review'].flush_model([review_field, 'rating', 'state'])
+        aggregate_fields = ['rating_sum', 'rating_count'] + [
+            f'rating_{star}_count' for star in range(1, 6)
+        ]
+        self.flush_model(aggregate_fields)
+        star_counts = ', '.join(
+            f'COUNT(r.id) FILTER (WHERE r.rating = {star})' for star in range(1, 6)
+        )
+        stored = ', '.join(f't."{fname}"' for fname in aggregate_fields)
+        self.env.cr.execute(f"""
+            SELECT t.id, {stored}, COALESCE(SUM(r.rating), 0), COUNT(r.id), {star_counts}
+              FROM "{self._table}" t
+         LEFT JOIN marketplace_review r
+                ON r."{review_field}" = t.id AND r.state = 'published'
+          GROUP BY t.id
+        """)
+
+        size = len(aggregate_fields)
+        deltas = {}
+        for row in self.env.cr.fetchall():
+            current = [value or 0 for value in row[1:1 + size]]
+            expected = row[1 + size:]
+            if list(expected) != current:
+                deltas[row[0]] = {
+                    fname: expected[index] - current[index]
+                    for index, fname in enumerate(aggregate_fields)
+                }
+
+        if deltas:
+            _logger.warning('Rebuilt rating aggregates of %d %s record(s)', len(deltas), self._name)
+        self._increment_counters(deltas)
+        return len(deltas)
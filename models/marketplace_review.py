@@ -2,6 +2,10 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from collections import defaultdict
+
+# Review fields affecting the rating aggregates of products and vendors
+RATING_FIELDS = {'state', 'rating', 'product_id', 'vendor_id'}
 
 class MarketplaceReview(models.Model):
     """Product and vendor reviews"""
@@ -41,6 +45,26 @@ class MarketplaceReview(models.Model):
          'Rating must be between 1 and 5!'),
     ]
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        reviews = super(MarketplaceReview, self).create(vals_list)
+        reviews._update_rating_aggregates(1)
+        return reviews
+
+    def write(self, vals):
+        if not RATING_FIELDS.intersection(vals):
+            return super(MarketplaceReview, self).write(vals)
+
+        product_deltas, vendor_deltas = self._get_rating_deltas(-1)
+        res = super(MarketplaceReview, self).write(vals)
+        self._get_rating_deltas(1, product_deltas, vendor_deltas)
+        self._apply_rating_deltas(product_deltas, vendor_deltas)
+        return res
+
+    def unlink(self):
+        self._update_rating_aggregates(-1)
+        return super(MarketplaceReview, self).unlink()
+
     @api.depends('order_id', 'customer_id')
     def _compute_verified_purchase(self):
         for review in self:
@@ -59,3 +83,53 @@ class MarketplaceReview(models.Model):
     def action_reject(self):
         self.write({'state': 'rejected'})
 
+    def _get_rating_deltas(self, sign, product_deltas=None, vendor_deltas=None):
+        """Collect the contribution of the published reviews in self to the aggregates"""
+        if product_deltas is None:
+            product_deltas = defaultdict(lambda: defaultdict(int))
+        if vendor_deltas is None:
+            vendor_deltas = defaultdict(lambda: defaultdict(int))
+
+        for review in self.filtered(lambda r: r.state == 'published'):
+            targets = []
+            if review.product_id:
+                targets.append(product_deltas[review.product_id.id])
+            if review.vendor_id:
+                targets.append(vendor_deltas[review.vendor_id.id])
+            for delta in targets:
+                delta['rating_sum'] += sign * review.rating
+                delta['rating_count'] += sign
+                delta[f'rating_{review.rating}_count'] += sign
+
+        return product_deltas, vendor_deltas
+
+    def _apply_rating_deltas(self, product_deltas, vendor_deltas):
+        """Write the non-zero deltas to the product and vendor aggregates"""
+        for model, deltas in (('marketplace.product', product_deltas),
+                              ('marketplace.vendor', vendor_deltas)):
+            deltas = {
+                record_id: delta
+                for record_id, delta in deltas.items()
+                if any(delta.values())
+            }
+            self.env[model]._increment_counters(deltas)
+
+    def _update_rating_aggregates(self, sign):
+        """Add (sign=1) or remove (sign=-1) the reviews from the rating aggregates"""
+        self._apply_rating_deltas(*self._get_rating_deltas(sign))
+
+    @api.model
+    def action_rebuild_rating_aggregates(self):
+        """Rebuild the product and vendor rating aggregates from the published reviews"""
+        count = self.env['marketplace.product']._rebuild_rating_aggregates()
+        count += self.env['marketplace.vendor']._rebuild_rating_aggregates()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Rating Aggregates Rebuilt'),
+                'message': _('%d record(s) were out of sync and have been corrected.') % count,
+                'type': 'warning' if count else 'success',
+                'sticky': False,
+            }
+        }
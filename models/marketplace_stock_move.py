@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools.sql import create_index
+from collections import defaultdict
+from datetime import timedelta
+import logging
+import threading
+
+_logger = logging.getLogger(__name__)
+
+
+class MarketplaceStockMove(models.Model):
+    """
+    Append-only ledger of marketplace stock changes.
+    Every change of marketplace.product.qty_available goes through it.
+    """
+    _name = 'marketplace.stock.move'
+    _description = 'Marketplace Stock Move'
+    _order = 'date desc, id desc'
+    _log_access = False
+
+    product_id = fields.Many2one('marketplace.product', string='Product', required=True,
+                                 ondelete='cascade', index=True)
+    quantity = fields.Float(string='Quantity', required=True,
+                            digits='Product Unit of Measure',
+                            help="Signed stock delta: positive adds stock, negative removes it")
+    reason = fields.Selection([
+        ('initial', 'Initial Stock'),
+        ('adjustment', 'Manual Adjustment'),
+        ('order_confirm', 'Order Confirmation'),
+        ('order_cancel', 'Order Cancellation'),
+        ('sync', 'Stock Sync'),
+        ('snapshot', 'Snapshot'),
+    ], string='Reason', required=True)
+    order_id = fields.Many2one('marketplace.order', string='Source Order', ondelete='set null')
+    date = fields.Datetime(string='Date', required=True, default=fields.Datetime.now, index=True)
+
+    def init(self):
+        create_index(self.env.cr, 'marketplace_stock_move_product_date_index',
+                     self._table, ['product_id', 'date'])
+
+    def write(self, vals):
+        raise UserError(_('Stock moves cannot be modified.'))
+
+    def unlink(self):
+        raise UserError(_('Stock moves cannot be deleted.'))
+
+    @api.model
+    def _apply_moves(self, vals_list):
+        """Apply signed stock deltas to the products and append them to the ledger.
+
+        The product rows are locked in id order so that concurrent
+        updates on overlapping products queue up instead of deadlocking,
+        then all of them are changed in one conditional UPDATE. Nothing is
+        applied if any product would end up below zero; a UserError lists
+        the products short of stock instead.
+        """
+        deltas = defaultdict(float)
+        for vals in vals_list:
+            deltas[vals['product_id']] += vals['quantity']
+        product_ids = sorted(product_id for product_id, delta in deltas.items() if delta)
+
+        if product_ids:
+            Product = self.env['marketplace.product']
+            Product.flush_model(['qty_available'])
+            self.env.cr.execute("""
+                WITH requested AS (
+                    SELECT * FROM unnest(%s::int[], %s::numeric[]) AS r(id, delta)
+                ), locked AS (
+                    SELECT p.id, COALESCE(p.qty_available, 0) AS qty_available
+                      FROM marketplace_product p
+                      JOIN requested r ON r.id = p.id
+                  ORDER BY p.id
+                       FOR UPDATE OF p
+                )
+                UPDATE marketplace_product p
+                   SET qty_available = COALESCE(p.qty_available, 0) + r.delta
+                  FROM requested r
+                 WHERE p.id = r.id
+                   AND (SELECT COUNT(*) FROM locked) = %s
+                   AND NOT EXISTS (
+                        SELECT 1
+                          FROM locked l
+                          JOIN requested lr ON lr.id = l.id
+                         WHERE l.qty_available + lr.delta < 0
+                   )
+             RETURNING p.id
+            """, [product_ids, [deltas[product_id] for product_id in product_ids], len(product_ids)])
+            updated = self.env.cr.fetchall()
+
+            products = Product.browse(product_ids)
+            products.invalidate_recordset(['qty_available'])
+            if len(updated) != len(product_ids):
+                missing = products.exists().filtered(
+                    lambda p: p.qty_available + deltas[p.id] < 0
+                )
+                raise UserError(_('Insufficient stock for %s') % ', '.join(
+                    missing.mapped('name') or [_('deleted product(s)')]
+                ))
+            products.modified(['qty_available'])
+
+        return self._record_moves(vals_list)
+
+    @api.model
+    def _record_moves(self, vals_list):
+        """Append moves to the ledger without touching the product quantities"""
+        return self.sudo().create([vals for vals in vals_list if vals['quantity']])
+
+    @api.model
+    def _cron_compact_moves(self, batch_size=1000):
+        """Fold the moves older than the retention period into one snapshot per product"""
+        retention_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'odoo_marketplace.stock_move_retention_days', 90
+        ))
+        cutoff = fields.Datetime.now() - timedelta(days=retention_days)
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT product_id
+              FROM marketplace_stock_move
+             WHERE date < %s
+          GROUP BY product_id
+            HAVING COUNT(*) > 1 OR bool_or(reason != 'snapshot')
+        """, [cutoff])
+        product_ids = [row[0] for row in self.env.cr.fetchall()]
+
+        for start in range(0, len(product_ids), batch_size):
+            batch = product_ids[start:start + batch_size]
+            self.env.cr.execute("""
+                WITH folded AS (
+                    DELETE FROM marketplace_stock_move
+                     WHERE product_id = ANY(%s) AND date < %s
+                 RETURNING product_id, quantity
+                )
+                INSERT INTO marketplace_stock_move (product_id, quantity, reason, date)
+                SELECT product_id, SUM(quantity), 'snapshot', %s
+                  FROM folded
+              GROUP BY product_id
+            """, [batch, cutoff, cutoff])
+            if auto_commit:
+                self.env.cr.commit()
+
+        self.invalidate_model()
+        _logger.info('Compacted stock moves of %d product(s) older than %s', len(product_ids), cutoff)
@@ -4,8 +4,18 @@ from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
 import logging
 
+from .marketplace_order import ORDER_COUNTED_STATES
+
 _logger = logging.getLogger(__name__)
 
+# Vendor tiers, used by the commission rules
+VENDOR_TIERS = [
+    ('standard', 'Standard'),
+    ('silver', 'Silver'),
+    ('gold', 'Gold'),
+    ('platinum', 'Platinum'),
+]
+
 
 class MarketplaceVendor(models.Model):
     """
@@ -14,9 +24,15 @@ class MarketplaceVendor(models.Model):
     """
     _name = 'marketplace.vendor'
     _description = 'Marketplace Vendor'
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'portal.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'portal.mixin',
+                'marketplace.rating.mixin', 'marketplace.image.variant.mixin']
     _order = 'create_date desc'
     _rec_name = 'display_name'
+    _rating_review_field = 'vendor_id'
+    _image_variants = {
+        'logo': {128: 'logo_128', 512: 'logo_512'},
+        'banner_image': {1024: 'banner_image_1024'},
+    }
 
     # Basic Information
     name = fields.Char(
@@ -81,6 +97,12 @@ class MarketplaceVendor(models.Model):
     logo_filename = fields.Char(string='Logo Filename')
     banner_image = fields.Binary(string='Banner Image', attachment=True)
     banner_filename = fields.Char(string='Banner Filename')
+    logo_128 = fields.Image(string='Logo 128', max_width=128, max_height=128,
+                            readonly=True, copy=False)
+    logo_512 = fields.Image(string='Logo 512', max_width=512, max_height=512,
+                            readonly=True, copy=False)
+    banner_image_1024 = fields.Image(string='Banner Image 1024', max_width=1024, max_height=1024,
+                                     readonly=True, copy=False)
     
     # Status and Workflow
     state = fields.Selection([
@@ -98,13 +120,23 @@ class MarketplaceVendor(models.Model):
     commission_type = fields.Selection([
         ('percentage', 'Percentage'),
         ('fixed', 'Fixed Amount'),
+        ('rules', 'Commission Rules'),
     ], string='Commission Type', default='percentage', required=True)
+    tier = fields.Selection(VENDOR_TIERS, string='Tier', default='standard', required=True,
+                            tracking=True)
     
     commission_rate = fields.Float(
         string='Commission Rate (%)',
         digits='Product Price',
         default=10.0,
-        help="Commission percentage on sales"
+        help="Commission percentage on sales, also used for the lines matched by no "
+             "commission rule"
+    )
+    
+    minimum_payout = fields.Monetary(
+        string='Minimum Payout',
+        currency_field='currency_id',
+        help="Unpaid amounts below this threshold are carried over to the next payout run"
     )
     
     fixed_commission = fields.Monetary(
@@ -163,14 +195,16 @@ class MarketplaceVendor(models.Model):
     )
     order_count = fields.Integer(
         string='Order Count',
-        compute='_compute_statistics',
-        store=True
+        readonly=True,
+        copy=False,
+        help="Confirmed orders, maintained by the order state transitions"
     )
     total_sales = fields.Monetary(
         string='Total Sales',
-        compute='_compute_statistics',
-        store=True,
-        currency_field='currency_id'
+        readonly=True,
+        copy=False,
+        currency_field='currency_id',
+        help="Total of completed orders, maintained by the order state transitions"
     )
     total_commission = fields.Monetary(
         string='Total Commission',
@@ -188,17 +222,6 @@ class MarketplaceVendor(models.Model):
         compute='_compute_payout_amounts',
         currency_field='currency_id'
     )
-    average_rating = fields.Float(
-        string='Average Rating',
-        compute='_compute_rating',
-        store=True,
-        digits=(3, 2)
-    )
-    review_count = fields.Integer(
-        string='Review Count',
-        compute='_compute_rating',
-        store=True
-    )
     
     # Display name
     display_name = fields.Char(
@@ -225,20 +248,25 @@ class MarketplaceVendor(models.Model):
         ('partner_unique', 'UNIQUE(partner_id)', 'A partner can only be linked to one vendor!'),
     ]
 
-    @api.model
-    def create(self, vals):
-        """Override create to generate sequence code"""
-        if vals.get('code', '/') == '/':
-            vals['code'] = self.env['ir.sequence'].next_by_code('marketplace.vendor') or '/'
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to generate sequence codes"""
+        pending = [vals for vals in vals_list if vals.get('code', '/') == '/']
+        codes = self.env['ir.sequence']._next_batch_by_code('marketplace.vendor', len(pending))
+        for vals, code in zip(pending, codes):
+            vals['code'] = code or '/'
         
-        vendor = super(MarketplaceVendor, self).create(vals)
+        vendors = super(MarketplaceVendor, self).create(vals_list)
         
-        # Send registration email
-        if vendor.state == 'draft':
-            vendor._send_registration_email()
+        # Send registration emails, queued when registering vendors in bulk
+        for vendor in vendors.filtered(lambda v: v.state == 'draft'):
+            vendor._send_registration_email(force_send=len(vendors) == 1)
         
-        _logger.info(f'New vendor created: {vendor.code} - {vendor.name}')
-        return vendor
+        if len(vendors) == 1:
+            _logger.info(f'New vendor created: {vendors.code} - {vendors.name}')
+        else:
+            _logger.info('%d new vendors created', len(vendors))
+        return vendors
 
     def write(self, vals):
         """Override write to track state changes"""
@@ -258,6 +286,8 @@ class MarketplaceVendor(models.Model):
                     'Cannot delete vendor %s because they have %d orders. '
                     'Please archive instead.'
                 ) % (vendor.name, vendor.order_count))
+        # Reviews cascade in SQL, remove them first to update the product ratings
+        self.env['marketplace.review'].sudo().search([('vendor_id', 'in', self.ids)]).unlink()
         return super(MarketplaceVendor, self).unlink()
 
     @api.depends('name', 'code')
@@ -266,50 +296,63 @@ class MarketplaceVendor(models.Model):
         for vendor in self:
             vendor.display_name = f'[{vendor.code}] {vendor.name}'
 
-    @api.depends('product_ids', 'order_ids', 'commission_ids')
+    @api.depends('product_ids', 'commission_ids.state', 'commission_ids.commission_amount')
     def _compute_statistics(self):
-        """Compute vendor statistics"""
+        """Compute vendor statistics with grouped queries for the whole recordset"""
+        vendor_ids = self.ids
+        product_counts = {}
+        commissions = {}
+
+        if vendor_ids:
+            product_counts = {
+                vendor.id: count
+                for vendor, count in self.env['marketplace.product']._read_group(
+                    [('vendor_id', 'in', vendor_ids)],
+                    ['vendor_id'], ['__count'],
+                )
+            }
+            commissions = {
+                vendor.id: amount
+                for vendor, amount in self.env['marketplace.commission']._read_group(
+                    [('vendor_id', 'in', vendor_ids), ('state', '=', 'paid')],
+                    ['vendor_id'], ['commission_amount:sum'],
+                )
+            }
+
         for vendor in self:
-            vendor.product_count = len(vendor.product_ids)
-            vendor.order_count = len(vendor.order_ids.filtered(
-                lambda o: o.state in ['confirmed', 'processing', 'delivered', 'done']
-            ))
-            
-            completed_orders = vendor.order_ids.filtered(lambda o: o.state == 'done')
-            vendor.total_sales = sum(completed_orders.mapped('amount_total'))
-            vendor.total_commission = sum(vendor.commission_ids.filtered(
-                lambda c: c.state == 'paid'
-            ).mapped('commission_amount'))
+            vendor_id = vendor._origin.id
+            vendor.product_count = product_counts.get(vendor_id, 0)
+            vendor.total_commission = commissions.get(vendor_id, 0.0)
 
-    @api.depends('commission_ids.state', 'commission_ids.commission_amount')
+    @api.depends('commission_ids.state', 'commission_ids.vendor_amount')
     def _compute_payout_amounts(self):
-        """Compute pending and paid payout amounts"""
-        for vendor in self:
-            vendor.pending_payout = sum(vendor.commission_ids.filtered(
-                lambda c: c.state in ['draft', 'confirmed']
-            ).mapped('vendor_amount'))
-            
-            vendor.paid_amount = sum(vendor.commission_ids.filtered(
-                lambda c: c.state == 'paid'
-            ).mapped('vendor_amount'))
+        """Compute pending and paid payout amounts with one grouped query.
+
+        The values live in the environment cache for the rest of the
+        transaction and are invalidated through the dependencies whenever
+        a commission changes state or amount.
+        """
+        pending = {}
+        paid = {}
+        if self.ids:
+            for vendor, state, amount in self.env['marketplace.commission']._read_group(
+                [('vendor_id', 'in', self.ids)],
+                ['vendor_id', 'state'], ['vendor_amount:sum'],
+            ):
+                if state in ('draft', 'confirmed'):
+                    pending[vendor.id] = pending.get(vendor.id, 0.0) + amount
+                elif state == 'paid':
+                    paid[vendor.id] = amount
 
-    @api.depends('review_ids.rating')
-    def _compute_rating(self):
-        """Compute average rating"""
         for vendor in self:
-            published_reviews = vendor.review_ids.filtered(lambda r: r.state == 'published')
-            vendor.review_count = len(published_reviews)
-            
-            if published_reviews:
-                vendor.average_rating = sum(published_reviews.mapped('rating')) / len(published_reviews)
-            else:
-                vendor.average_rating = 0.0
+            vendor.pending_payout = pending.get(vendor._origin.id, 0.0)
+            vendor.paid_amount = paid.get(vendor._origin.id, 0.0)
 
     @api.constrains('commission_rate')
     def _check_commission_rate(self):
         """Validate commission rate"""
         for vendor in self:
-            if vendor.commission_type == 'percentage' and (
+            if vendor.commission_type != 'fixed' and (
                 vendor.commission_rate < 0 or vendor.commission_rate > 100
             ):
                 raise ValidationError(_('Commission rate must be between 0 and 100%'))
@@ -418,18 +461,77 @@ class MarketplaceVendor(models.Model):
             'domain': [('vendor_id', '=', self.id)],
         }
 
+    @api.model
+    def action_reconcile_sales_counters(self):
+        """Rebuild vendor and product sales counters and report the drift"""
+        drift = self._reconcile_sales_counters()
+        drift += self.env['marketplace.product']._reconcile_sales_counters()
+
+        if drift:
+            message = _('%d counter(s) were out of sync and have been corrected:\n%s') % (
+                len(drift), '\n'.join(drift[:50])
+            )
+        else:
+            message = _('All sales counters are in sync.')
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Sales Counters Reconciled'),
+                'message': message,
+                'type': 'warning' if drift else 'success',
+                'sticky': bool(drift),
+            }
+        }
+
     # Private Methods
+    @api.model
+    def _reconcile_sales_counters(self):
+        """Recompute order_count/total_sales from the orders and fix drifted vendors"""
+        self.env['marketplace.order'].flush_model(['vendor_id', 'state', 'amount_total'])
+        self.flush_model(['order_count', 'total_sales'])
+        self.env.cr.execute("""
+            SELECT v.id, v.code, v.order_count, v.total_sales,
+                   COALESCE(s.order_count, 0), COALESCE(s.total_sales, 0)
+              FROM marketplace_vendor v
+         LEFT JOIN (
+                SELECT vendor_id,
+                       COUNT(*) FILTER (WHERE state IN %s) AS order_count,
+                       SUM(amount_total) FILTER (WHERE state = 'done') AS total_sales
+                  FROM marketplace_order
+              GROUP BY vendor_id
+             ) s ON s.vendor_id = v.id
+             WHERE COALESCE(v.order_count, 0) != COALESCE(s.order_count, 0)
+                OR COALESCE(v.total_sales, 0) != COALESCE(s.total_sales, 0)
+        """, [tuple(ORDER_COUNTED_STATES)])
+
+        deltas = {}
+        drift = []
+        for vendor_id, code, order_count, total_sales, real_count, real_sales in self.env.cr.fetchall():
+            deltas[vendor_id] = {
+                'order_count': real_count - (order_count or 0),
+                'total_sales': real_sales - (total_sales or 0),
+            }
+            drift.append(_('Vendor %s: orders %s -> %s, sales %s -> %s') % (
+                code, order_count or 0, real_count, total_sales or 0, real_sales
+            ))
+            _logger.warning(drift[-1])
+
+        self._increment_counters(deltas)
+        return drift
+
     def _handle_state_change(self, old_state, new_state):
         """Handle state change actions"""
         for vendor in self:
             _logger.info(f'Vendor {vendor.code} state changed: {old_state} -> {new_state}')
 
-    def _send_registration_email(self):
+    def _send_registration_email(self, force_send=True):
         """Send registration confirmation email"""
         template = self.env.ref('odoo_marketplace.email_template_vendor_registration',
                                 raise_if_not_found=False)
         if template:
-            template.send_mail(self.id, force_send=True)
+            template.send_mail(self.id, force_send=force_send)
 
     def _send_approval_request_email(self):
         """Send approval request to admin"""
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+
+from . import test_idempotency_key
+from . import test_payout_export
+from . import test_product_search_benchmark
+from . import test_stock_reservation
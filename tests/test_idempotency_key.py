@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import uuid
+
+from odoo.service.model import retrying
+from odoo.tests.common import BaseCase, tagged
+
+from .test_stock_reservation import environment
+
+ENDPOINT = 'checkout'
+
+
+@tagged('-at_install', 'post_install')
+class TestIdempotencyKeyConcurrency(BaseCase):
+    """A call retried with the same key while the first one is still running,
+    on real committed transactions."""
+
+    def setUp(self):
+        super().setUp()
+        self.key = 'test-%s' % uuid.uuid4()
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with environment() as env:
+            env.cr.execute("DELETE FROM marketplace_idempotency_key WHERE key = %s", [self.key])
+
+    def _wait_for_blocked_claim(self, timeout=10):
+        """Wait until a transaction is blocked inserting an idempotency key"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with environment() as env:
+                env.cr.execute("""
+                    SELECT COUNT(*)
+                      FROM pg_stat_activity
+                     WHERE datname = current_database()
+                       AND wait_event_type = 'Lock'
+                       AND query LIKE '%%INSERT INTO marketplace_idempotency_key%%'
+                """)
+                if env.cr.fetchone()[0]:
+                    return
+            time.sleep(0.05)
+        self.fail("The concurrent call never blocked on the idempotency key")
+
+    def test_concurrent_retry_gets_stored_response(self):
+        payload = {'order_lines': [{'product_id': 1, 'quantity': 2}]}
+        response = {'success': True, 'order_ids': [42]}
+        attempts = []
+        results = {}
+
+        def retry():
+            try:
+                with environment() as env:
+                    def attempt():
+                        attempts.append(1)
+                        return env['marketplace.idempotency.key']._claim(self.key, ENDPOINT, payload)
+                    results['retry'] = retrying(attempt, env)
+            except Exception as e:
+                results['retry'] = repr(e)
+
+        thread = threading.Thread(target=retry)
+        with environment() as env:
+            Key = env['marketplace.idempotency.key']
+            self.assertEqual(Key._claim(self.key, ENDPOINT, payload), (True, None))
+            thread.start()
+            # The retry snapshot is taken before the first call commits
+            self._wait_for_blocked_claim()
+            Key._store(self.key, ENDPOINT, response)
+        thread.join(timeout=60)
+        self.assertFalse(thread.is_alive(), "The concurrent call deadlocked")
+
+        # The first attempt fails to serialize once the first call commits,
+        # the retried attempt sees the committed key and its response
+        self.assertEqual(results.get('retry'), (False, response))
+        self.assertEqual(len(attempts), 2)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+import tempfile
+
+from odoo.tests.common import TransactionCase, tagged
+
+
+@tagged('-at_install', 'post_install')
+class TestPayoutExport(TransactionCase):
+    """The exported bank file is the one stored in the attachment"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        partner = cls.env['res.partner'].create({'name': 'Export Test Vendor'})
+        cls.vendor = cls.env['marketplace.vendor'].create({
+            'name': 'Export Test Vendor',
+            'partner_id': partner.id,
+            'bank_name': 'Test Bank',
+            'bank_account_name': 'Export Test Vendor',
+            'bank_account_number': 'DE89 3704 0044 0532 0130 00',
+            'bank_swift_code': 'COBADEFFXXX',
+        })
+        customer = cls.env['res.partner'].create({'name': 'Export Test Customer'})
+        cls.payouts = cls.env['marketplace.payout'].create([
+            {'vendor_id': cls.vendor.id} for _i in range(3)
+        ])
+        for index, payout in enumerate(cls.payouts, start=1):
+            order = cls.env['marketplace.order'].create({
+                'customer_id': customer.id,
+                'vendor_id': cls.vendor.id,
+            })
+            cls.env['marketplace.commission'].create({
+                'order_id': order.id,
+                'vendor_id': cls.vendor.id,
+                'order_amount': 100.0 * index,
+                'state': 'confirmed',
+                'payout_id': payout.id,
+            })
+
+    def _export(self):
+        wizard = self.env['marketplace.payout.export.wizard'].create({
+            'payout_ids': [(6, 0, self.payouts.ids)],
+            'export_format': 'csv',
+        })
+        action = wizard.action_export()
+        attachment_id = int(action['url'].split('/')[3].split('?')[0])
+        attachment = self.env['ir.attachment'].browse(attachment_id)
+
+        with tempfile.TemporaryFile() as tmp:
+            wizard._write_csv(tmp)
+            tmp.seek(0)
+            expected = tmp.read()
+        return attachment, expected
+
+    def test_export_filestore(self):
+        self.env['ir.config_parameter'].sudo().set_param('ir_attachment.location', 'file')
+        attachment, expected = self._export()
+        self.assertTrue(expected.count(b'\n') > 3, "The file should list the payouts")
+        self.assertTrue(attachment.store_fname)
+        self.assertEqual(attachment.file_size, len(expected))
+        self.assertEqual(attachment.raw, expected)
+
+    def test_export_database(self):
+        self.env['ir.config_parameter'].sudo().set_param('ir_attachment.location', 'db')
+        attachment, expected = self._export()
+        self.assertFalse(attachment.store_fname)
+        self.assertEqual(attachment.raw, expected)
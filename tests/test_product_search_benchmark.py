@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+import unittest
+
+from odoo.tests.common import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged('-standard', '-at_install', 'post_install', 'marketplace_benchmark')
+class TestProductSearchBenchmark(TransactionCase):
+    """Ranked product search against the former ``name ilike`` baseline.
+
+    Not part of the standard run, use ``--test-tags marketplace_benchmark``.
+    """
+
+    PRODUCTS = 20000
+    ROUNDS = 20
+    WORDS = ['wireless', 'bluetooth', 'speaker', 'leather', 'wallet', 'ceramic', 'coffee',
+             'mug', 'running', 'shoes', 'organic', 'cotton', 'shirt', 'steel', 'bottle']
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if not cls.registry.has_trigram:
+            raise unittest.SkipTest("pg_trgm is not installed")
+        partner = cls.env['res.partner'].create({'name': 'Benchmark Vendor'})
+        vendor = cls.env['marketplace.vendor'].create({'name': 'Benchmark Vendor', 'partner_id': partner.id})
+        category = cls.env['marketplace.category'].create({'name': 'Benchmark Category'})
+        words = cls.WORDS
+        for start in range(0, cls.PRODUCTS, 1000):
+            cls.env['marketplace.product'].create([{
+                'name': ' '.join([words[i % len(words)], words[(i * 7) % len(words)],
+                                  words[(i * 11) % len(words)], str(i)]),
+                'vendor_id': vendor.id,
+                'category_id': category.id,
+                'list_price': 10.0,
+            } for i in range(start, min(start + 1000, cls.PRODUCTS))])
+        cls.env.flush_all()
+        cls.env.cr.execute("ANALYZE marketplace_product")
+
+    def _time(self, func):
+        start = time.perf_counter()
+        for _round in range(self.ROUNDS):
+            func()
+        return (time.perf_counter() - start) / self.ROUNDS * 1000
+
+    def test_ranked_search_vs_ilike(self):
+        Product = self.env['marketplace.product']
+        for terms in ['bluetooth speaker', 'leather']:
+            baseline = self._time(lambda: Product.search([('name', 'ilike', terms)], limit=20))
+            ranked = self._time(lambda: Product._search_ranked(terms, limit=20))
+            _logger.info("Product search %r over %d products: ilike %.2f ms, ranked %.2f ms",
+                         terms, self.PRODUCTS, baseline, ranked)
+
+        # Typo tolerance, which the ilike baseline does not have
+        products, total = Product._search_ranked('blutooth speeker', limit=20)
+        self.assertTrue(total)
+        self.assertFalse(Product.search_count([('name', 'ilike', 'blutooth speeker')]))
+        self.assertIn('bluetooth', products[0].name)
+
+    def test_search_uses_indexes(self):
+        """The ranked search filter must be answerable from the GIN indexes"""
+        Product = self.env['marketplace.product']
+        for terms in ['bluetooth', 'blutooth']:
+            where, params = Product._search_match_sql(terms, [])
+            self.env.cr.execute("SET LOCAL enable_seqscan = off")
+            self.env.cr.execute(f"EXPLAIN SELECT p.id FROM marketplace_product p WHERE {where}", params)
+            plan = '\n'.join(row[0] for row in self.env.cr.fetchall())
+            self.assertIn('marketplace_product_search_text_trgm_index', plan, plan)
+            self.assertIn('marketplace_product_search_text_tsv_index', plan, plan)
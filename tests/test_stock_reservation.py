@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager
+import threading
+
+from psycopg2 import OperationalError
+from psycopg2.errorcodes import SERIALIZATION_FAILURE
+
+from odoo import api, SUPERUSER_ID
+from odoo.exceptions import UserError
+from odoo.modules.registry import Registry
+from odoo.service.model import retrying
+from odoo.tests.common import BaseCase, get_db_name, tagged
+
+
+@contextmanager
+def environment():
+    """Yield an environment on a new cursor, committed on success"""
+    registry = Registry(get_db_name())
+    with registry.cursor() as cr:
+        yield api.Environment(cr, SUPERUSER_ID, {})
+
+
+@tagged('-at_install', 'post_install')
+class TestStockReservationConcurrency(BaseCase):
+    """Concurrent confirmations of orders on the same product, on real
+    committed transactions: no thread shares the cursor of another."""
+
+    THREADS = 8
+    STOCK = 5
+
+    def setUp(self):
+        super().setUp()
+        with environment() as env:
+            partner = env['res.partner'].create({'name': 'Reservation Test Vendor'})
+            vendor = env['marketplace.vendor'].create({
+                'name': 'Reservation Test Vendor',
+                'partner_id': partner.id,
+            })
+            category = env['marketplace.category'].create({'name': 'Reservation Test Category'})
+            product = env['marketplace.product'].create({
+                'name': 'Hot Product',
+                'vendor_id': vendor.id,
+                'category_id': category.id,
+                'list_price': 10.0,
+                'qty_available': self.STOCK,
+            })
+            customer = env['res.partner'].create({'name': 'Reservation Test Customer'})
+            orders = env['marketplace.order'].create([{
+                'customer_id': customer.id,
+                'vendor_id': vendor.id,
+                'order_line_ids': [(0, 0, {
+                    'product_id': product.id,
+                    'product_name': product.name,
+                    'quantity': 1,
+                    'price_unit': 10.0,
+                })],
+            } for _i in range(self.THREADS)])
+            self.partner_ids = [partner.id, customer.id]
+            self.vendor_id = vendor.id
+            self.category_id = category.id
+            self.product_id = product.id
+            self.order_ids = orders.ids
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        # The ledger and the confirmed orders cannot be removed through the ORM
+        with environment() as env:
+            cr = env.cr
+            cr.execute("DELETE FROM marketplace_order WHERE id = ANY(%s)", [self.order_ids])
+            cr.execute("DELETE FROM marketplace_product WHERE id = %s", [self.product_id])
+            cr.execute("DELETE FROM marketplace_category WHERE id = %s", [self.category_id])
+            cr.execute("DELETE FROM marketplace_vendor WHERE id = %s", [self.vendor_id])
+            cr.execute("DELETE FROM res_partner WHERE id = ANY(%s)", [self.partner_ids])
+
+    def test_concurrent_confirmations(self):
+        # All the transactions take their snapshot before the first one
+        # commits, so every lock waiter hits a serialization failure
+        snapshot_barrier = threading.Barrier(self.THREADS)
+        lock = threading.Lock()
+        results = {}
+        attempts = {}
+
+        def confirm(order_id):
+            try:
+                with environment() as env:
+                    def attempt():
+                        with lock:
+                            attempts[order_id] = attempts.get(order_id, 0) + 1
+                            first_try = attempts[order_id] == 1
+                        order = env['marketplace.order'].browse(order_id)
+                        order.state
+                        if first_try:
+                            snapshot_barrier.wait(timeout=30)
+                        order.action_confirm()
+                    retrying(attempt, env)
+                results[order_id] = 'confirmed'
+            except UserError:
+                results[order_id] = 'out_of_stock'
+            except OperationalError as e:
+                results[order_id] = e.pgcode or 'operational_error'
+            except Exception as e:
+                results[order_id] = repr(e)
+
+        threads = [threading.Thread(target=confirm, args=(order_id,)) for order_id in self.order_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=120)
+        self.assertFalse(any(thread.is_alive() for thread in threads), "A confirmation deadlocked")
+
+        outcomes = sorted(results.values())
+        self.assertNotIn(SERIALIZATION_FAILURE, outcomes,
+                         "Serialization failures must be retried, not surface to the user")
+        self.assertEqual(outcomes.count('confirmed'), self.STOCK, outcomes)
+        self.assertEqual(outcomes.count('out_of_stock'), self.THREADS - self.STOCK, outcomes)
+        self.assertGreater(sum(attempts.values()), self.THREADS,
+                           "The contention should have caused retried transactions")
+
+        with environment() as env:
+            product = env['marketplace.product'].browse(self.product_id)
+            self.assertEqual(product.qty_available, 0, "Stock was oversold or leaked")
+            confirmed = env['marketplace.order'].search_count([
+                ('id', 'in', self.order_ids), ('state', '=', 'confirmed'),
+            ])
+            self.assertEqual(confirmed, self.STOCK)
+            moves = env['marketplace.stock.move'].search([
+                ('product_id', '=', self.product_id), ('reason', '=', 'order_confirm'),
+            ])
+            self.assertEqual(sum(moves.mapped('quantity')), -self.STOCK)
@@ -1,4 +1,8 @@
 # -*- coding: utf-8 -*-
 
+from . import marketplace_commission_rerate_wizard
 from . import marketplace_mass_confirm_wizard
+from . import marketplace_order_ship_wizard
+from . import marketplace_payout_export_wizard
+from . import marketplace_product_import_wizard
 from . import marketplace_vendor_payout_wizard
\ No newline at end of file
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from datetime import timedelta
+
+class MarketplaceCommissionRerateWizard(models.TransientModel):
+    """Wizard applying the current vendor rates to past commissions"""
+    _name = 'marketplace.commission.rerate.wizard'
+    _description = 'Commission Re-rating Wizard'
+
+    date_from = fields.Date(string='From', required=True)
+    date_to = fields.Date(string='To', required=True, default=fields.Date.context_today)
+    vendor_ids = fields.Many2many(
+        'marketplace.vendor',
+        string='Vendors',
+        help="Leave empty to re-rate the commissions of all vendors"
+    )
+
+    @api.constrains('date_from', 'date_to')
+    def _check_dates(self):
+        for wizard in self:
+            if wizard.date_from > wizard.date_to:
+                raise ValidationError(_('The start date must be before the end date'))
+
+    def action_rerate(self):
+        """Re-rate the unpaid commissions created in the period"""
+        self.ensure_one()
+        
+        domain = [
+            ('create_date', '>=', self.date_from),
+            ('create_date', '<', self.date_to + timedelta(days=1)),
+            ('state', '!=', 'paid'),
+        ]
+        if self.vendor_ids:
+            domain.append(('vendor_id', 'in', self.vendor_ids.ids))
+        count = self.env['marketplace.commission'].search(domain, order='id')._rerate()
+        
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Commissions Re-rated'),
+                'message': _('%d commission(s) updated with the current vendor rates.') % count,
+                'type': 'success',
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import base64
+import csv
+import io
+
+class MarketplaceOrderShipWizard(models.TransientModel):
+    """Wizard shipping a wave of orders, with tracking numbers from a CSV file"""
+    _name = 'marketplace.order.ship.wizard'
+    _description = 'Order Shipping Wizard'
+
+    order_ids = fields.Many2many(
+        'marketplace.order',
+        string='Orders to Ship',
+        domain="[('state', 'in', ['confirmed', 'processing'])]"
+    )
+    
+    tracking_file = fields.Binary(
+        string='Tracking Numbers',
+        help="CSV file with an 'order' column (order reference) and a 'tracking_number' column. "
+             "The listed orders are shipped along with the selected ones."
+    )
+    tracking_filename = fields.Char(string='Filename')
+
+    @api.model
+    def default_get(self, fields_list):
+        """Get default values from context"""
+        res = super(MarketplaceOrderShipWizard, self).default_get(fields_list)
+        
+        if self.env.context.get('active_ids'):
+            orders = self.env['marketplace.order'].search([
+                ('id', 'in', self.env.context.get('active_ids')),
+                ('state', 'in', ['confirmed', 'processing']),
+            ])
+            res['order_ids'] = [(6, 0, orders.ids)]
+        
+        return res
+
+    def action_ship_orders(self):
+        """Ship the selected orders and the orders of the tracking file"""
+        self.ensure_one()
+        
+        tracking_numbers = self._read_tracking_numbers() if self.tracking_file else {}
+        orders = self.order_ids | self.env['marketplace.order'].browse(list(tracking_numbers))
+        if not orders:
+            raise UserError(_('Please select orders or upload a tracking file'))
+        
+        orders.action_ship(tracking_numbers=tracking_numbers)
+        
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Orders Shipped'),
+                'message': _('%d order(s) shipped, %d tracking number(s) set.') % (
+                    len(orders), len(tracking_numbers)
+                ),
+                'type': 'success',
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
+
+    def _read_tracking_numbers(self):
+        """Return ``{order_id: tracking number}`` from the tracking file"""
+        content = base64.b64decode(self.tracking_file).decode('utf-8-sig')
+        reader = csv.DictReader(io.StringIO(content))
+        if not {'order', 'tracking_number'} <= set(reader.fieldnames or []):
+            raise UserError(_("The tracking file needs 'order' and 'tracking_number' columns"))
+        
+        by_name = {}
+        for row in reader:
+            name = (row['order'] or '').strip()
+            if name and (row['tracking_number'] or '').strip():
+                by_name[name] = row['tracking_number'].strip()
+        
+        orders = self.env['marketplace.order'].search_read(
+            [('name', 'in', list(by_name))], ['name']
+        )
+        unknown = set(by_name) - {order['name'] for order in orders}
+        if unknown:
+            raise UserError(_('Unknown order(s) in the tracking file: %s') % ', '.join(sorted(unknown)))
+        return {order['id']: by_name[order['name']] for order in orders}
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from xml.sax.saxutils import escape
+import csv
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+
+# IBAN shape checked for SEPA transfers, on the account number without spaces
+IBAN_PATTERN = '^[A-Z]{2}[0-9]{2}[A-Z0-9]{11,30}$'
+# Payouts fetched per query, and bytes copied per read, while exporting
+EXPORT_PAGE_SIZE = 2000
+COPY_BLOCK_SIZE = 1024 * 1024
+
+class MarketplacePayoutExportWizard(models.TransientModel):
+	"""Wizard exporting payouts as a bank payment file (SEPA XML or CSV)"""
+	_name = 'marketplace.payout.export.wizard'
+	_description = 'Payout Bank File Export Wizard'
+
+	run_id = fields.Many2one('marketplace.payout.run', string='Payout Run')
+	payout_ids = fields.Many2many('marketplace.payout', string='Payouts')
+	export_format = fields.Selection([
+		('sepa', 'SEPA Credit Transfer (pain.001)'),
+		('csv', 'CSV'),
+	], string='Format', default='sepa', required=True)
+	execution_date = fields.Date(string='Execution Date', required=True, default=fields.Date.context_today)
+	state = fields.Selection([
+		('draft', 'Draft'),
+		('invalid', 'Missing Bank Data'),
+	], string='Status', default='draft')
+	invalid_vendor_ids = fields.Many2many(
+		'marketplace.vendor',
+		string='Vendors Missing Bank Data',
+		readonly=True
+	)
+
+	@api.model
+	def default_get(self, fields_list):
+		"""Get default values from context"""
+		res = super(MarketplacePayoutExportWizard, self).default_get(fields_list)
+		if not res.get('run_id') and self.env.context.get('active_model') == 'marketplace.payout':
+			res['payout_ids'] = [(6, 0, self.env.context.get('active_ids', []))]
+		return res
+
+	def action_export(self):
+		"""Validate the bank data of the vendors, then write the payment file"""
+		self.ensure_one()
+		if not self.run_id and not self.payout_ids:
+			raise UserError(_('Please select a payout run or payouts to export'))
+
+		self.env['marketplace.payout'].flush_model()
+		self.env['marketplace.vendor'].flush_model()
+		invalid_vendor_ids = self._get_invalid_vendor_ids()
+		if invalid_vendor_ids:
+			self.write({'state': 'invalid', 'invalid_vendor_ids': [(6, 0, invalid_vendor_ids)]})
+			return {
+				'type': 'ir.actions.act_window',
+				'res_model': self._name,
+				'res_id': self.id,
+				'view_mode': 'form',
+				'target': 'new',
+			}
+
+		with tempfile.TemporaryFile() as tmp:
+			if self.export_format == 'sepa':
+				self._write_sepa(tmp)
+				filename, mimetype = 'payouts_%s.xml', 'application/xml'
+			else:
+				self._write_csv(tmp)
+				filename, mimetype = 'payouts_%s.csv', 'text/csv'
+			attachment = self._create_attachment_from_file(tmp, {
+				'name': filename % fields.Date.to_string(self.execution_date),
+				'mimetype': mimetype,
+				'res_model': 'marketplace.payout.run' if self.run_id else False,
+				'res_id': self.run_id.id,
+			})
+
+		return {
+			'type': 'ir.actions.act_url',
+			'url': '/web/content/%d?download=true' % attachment.id,
+			'target': 'self',
+		}
+
+	def _payout_where(self):
+		"""SQL condition and parameters selecting the exported payouts"""
+		if self.run_id:
+			return 'p.run_id = %s', [self.run_id.id]
+		return 'p.id = ANY(%s)', [self.payout_ids.ids]
+
+	def _get_invalid_vendor_ids(self):
+		"""Return the vendors of the payouts missing bank data, in one query"""
+		where, params = self._payout_where()
+		checks = [
+			"COALESCE(TRIM(v.bank_account_number), '') = ''",
+			"COALESCE(TRIM(COALESCE(v.bank_account_name, v.name)), '') = ''",
+		]
+		if self.export_format == 'sepa':
+			checks.append("UPPER(REPLACE(v.bank_account_number, ' ', '')) !~ %s")
+			params = params + [IBAN_PATTERN]
+		self.env.cr.execute(f"""
+			SELECT DISTINCT v.id
+			  FROM marketplace_payout p
+			  JOIN marketplace_vendor v ON v.id = p.vendor_id
+			 WHERE {where}
+			   AND p.amount > 0
+			   AND ({' OR '.join(checks)})
+		""", params)
+		return [row[0] for row in self.env.cr.fetchall()]
+
+	def _iter_payouts(self):
+		"""Yield the payout rows one page at a time, in constant memory"""
+		where, params = self._payout_where()
+		last_id = 0
+		while True:
+			self.env.cr.execute(f"""
+				SELECT p.id, p.name, p.amount, cur.name, v.name, COALESCE(v.bank_account_name, v.name),
+				       UPPER(REPLACE(v.bank_account_number, ' ', '')), v.bank_swift_code, v.bank_name
+				  FROM marketplace_payout p
+				  JOIN marketplace_vendor v ON v.id = p.vendor_id
+			 LEFT JOIN res_currency cur ON cur.id = p.currency_id
+				 WHERE {where}
+				   AND p.amount > 0
+				   AND p.id > %s
+			  ORDER BY p.id
+				 LIMIT %s
+			""", params + [last_id, EXPORT_PAGE_SIZE])
+			rows = self.env.cr.fetchall()
+			if not rows:
+				return
+			for row in rows:
+				yield row[1:]
+			last_id = rows[-1][0]
+
+	def _create_attachment_from_file(self, tmp, vals):
+		"""Create an attachment with the content of the binary file ``tmp``.
+
+		With the filestore, the file is copied block by block under its
+		checksum, the way ir.attachment stores it, so the content is never
+		loaded in memory. create() and write() drop store_fname, checksum
+		and file_size, so the empty attachment is pointed to the file in SQL.
+		Database storage needs the content in memory.
+		"""
+		Attachment = self.env['ir.attachment']
+		tmp.seek(0)
+		if Attachment._storage() != 'file':
+			return Attachment.create(dict(vals, raw=tmp.read()))
+
+		sha = hashlib.sha1()
+		size = 0
+		for block in iter(lambda: tmp.read(COPY_BLOCK_SIZE), b''):
+			sha.update(block)
+			size += len(block)
+		checksum = sha.hexdigest()
+		fname = '%s/%s' % (checksum[:2], checksum)
+		full_path = Attachment._full_path(fname)
+		if not os.path.isfile(full_path):
+			dirname = os.path.dirname(full_path)
+			os.makedirs(dirname, exist_ok=True)
+			tmp.seek(0)
+			with tempfile.NamedTemporaryFile(dir=dirname, delete=False) as target:
+				shutil.copyfileobj(tmp, target, COPY_BLOCK_SIZE)
+			os.replace(target.name, full_path)
+			# Removed by the filestore garbage collector if the transaction rolls back
+			Attachment._mark_for_gc(fname)
+
+		attachment = Attachment.create(vals)
+		self.env.cr.execute("""
+			UPDATE ir_attachment
+			   SET store_fname = %s, checksum = %s, file_size = %s, db_datas = NULL
+			 WHERE id = %s
+		""", [fname, checksum, size, attachment.id])
+		attachment.invalidate_recordset(['store_fname', 'checksum', 'file_size', 'db_datas', 'raw', 'datas'])
+		return attachment
+
+	def _write_csv(self, tmp):
+		text = io.TextIOWrapper(tmp, encoding='utf-8', newline='')
+		writer = csv.writer(text)
+		writer.writerow(['reference', 'vendor', 'account_name', 'account_number',
+						 'swift_code', 'bank_name', 'amount', 'currency'])
+		for reference, amount, currency, vendor, account_name, account_number, swift, bank in self._iter_payouts():
+			writer.writerow([reference, vendor, account_name, account_number,
+							 swift or '', bank or '', '%.2f' % amount, currency])
+		text.flush()
+		text.detach()
+
+	def _write_sepa(self, tmp):
+		"""Write a pain.001.001.03 credit transfer initiation"""
+		company = self.env.company
+		company_bank = company.partner_id.bank_ids[:1]
+		if not company_bank.acc_number:
+			raise UserError(_('Set a bank account on the company %s to export SEPA transfers') % company.name)
+
+		where, params = self._payout_where()
+		self.env.cr.execute(f"""
+			SELECT COUNT(*), COALESCE(SUM(p.amount), 0), ARRAY_AGG(DISTINCT cur.name)
+			  FROM marketplace_payout p
+		 LEFT JOIN res_currency cur ON cur.id = p.currency_id
+			 WHERE {where}
+			   AND p.amount > 0
+		""", params)
+		count, total, currencies = self.env.cr.fetchone()
+		if not count:
+			raise UserError(_('There is no payout to export'))
+		if [currency for currency in currencies if currency != 'EUR']:
+			raise UserError(_('SEPA transfers can only pay out amounts in EUR'))
+
+		message_id = 'MKP-%s-%s' % (fields.Datetime.now().strftime('%Y%m%d%H%M%S'), self.id)
+		debtor = escape(company.name[:70])
+		debtor_bic = company_bank.bank_bic
+		debtor_agent = ('<BIC>%s</BIC>' % escape(debtor_bic) if debtor_bic
+						else '<Othr><Id>NOTPROVIDED</Id></Othr>')
+		write = lambda text: tmp.write(text.encode('utf-8'))
+
+		write('<?xml version="1.0" encoding="UTF-8"?>\n'
+			  '<Document xmlns="urn:iso:std:iso:20022:tech:xsd:pain.001.001.03" '
+			  'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+			  '<CstmrCdtTrfInitn>'
+			  '<GrpHdr><MsgId>%(msg)s</MsgId><CreDtTm>%(now)s</CreDtTm>'
+			  '<NbOfTxs>%(count)d</NbOfTxs><CtrlSum>%(total).2f</CtrlSum>'
+			  '<InitgPty><Nm>%(debtor)s</Nm></InitgPty></GrpHdr>'
+			  '<PmtInf><PmtInfId>%(msg)s</PmtInfId><PmtMtd>TRF</PmtMtd><BtchBookg>true</BtchBookg>'
+			  '<NbOfTxs>%(count)d</NbOfTxs><CtrlSum>%(total).2f</CtrlSum>'
+			  '<PmtTpInf><SvcLvl><Cd>SEPA</Cd></SvcLvl></PmtTpInf>'
+			  '<ReqdExctnDt>%(date)s</ReqdExctnDt>'
+			  '<Dbtr><Nm>%(debtor)s</Nm></Dbtr>'
+			  '<DbtrAcct><Id><IBAN>%(iban)s</IBAN></Id></DbtrAcct>'
+			  '<DbtrAgt><FinInstnId>%(agent)s</FinInstnId></DbtrAgt>'
+			  '<ChrgBr>SLEV</ChrgBr>\n' % {
+				  'msg': message_id,
+				  'now': fields.Datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+				  'count': count,
+				  'total': total,
+				  'debtor': debtor,
+				  'date': fields.Date.to_string(self.execution_date),
+				  'iban': escape(company_bank.sanitized_acc_number),
+				  'agent': debtor_agent,
+			  })
+		for reference, amount, currency, vendor, account_name, account_number, swift, bank in self._iter_payouts():
+			creditor_agent = ('<CdtrAgt><FinInstnId><BIC>%s</BIC></FinInstnId></CdtrAgt>' % escape(swift.strip())
+							  if swift else '')
+			write('<CdtTrfTxInf><PmtId><EndToEndId>%s</EndToEndId></PmtId>'
+				  '<Amt><InstdAmt Ccy="EUR">%.2f</InstdAmt></Amt>%s'
+				  '<Cdtr><Nm>%s</Nm></Cdtr>'
+				  '<CdtrAcct><Id><IBAN>%s</IBAN></Id></CdtrAcct>'
+				  '<RmtInf><Ustrd>%s</Ustrd></RmtInf></CdtTrfTxInf>\n' % (
+					  escape(reference[:35]), amount, creditor_agent, escape(account_name[:70]),
+					  escape(account_number), escape((_('Marketplace payout %s') % reference)[:140]),
+				  ))
+		write('</PmtInf></CstmrCdtTrfInitn></Document>\n')
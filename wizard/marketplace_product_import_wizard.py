@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _, Command
+from odoo.exceptions import UserError
+import base64
+import csv
+import io
+import json
+import logging
+import tempfile
+
+_logger = logging.getLogger(__name__)
+
+# Numeric columns accepted by the import, mapped to marketplace.product fields
+FLOAT_COLUMNS = [
+    'list_price', 'cost_price', 'qty_available', 'low_stock_threshold',
+    'discount_percentage', 'weight', 'length', 'width', 'height',
+]
+TEXT_COLUMNS = ['short_description', 'description', 'meta_title', 'meta_description', 'meta_keywords']
+
+
+class MarketplaceProductImportWizard(models.TransientModel):
+    """
+    Bulk product import for vendor catalogs.
+    The file is streamed from the filestore and products are created in
+    chunks; rows that fail are reported in an error file instead of
+    aborting the whole import.
+    """
+    _name = 'marketplace.product.import.wizard'
+    _description = 'Marketplace Product Import Wizard'
+
+    vendor_id = fields.Many2one(
+        'marketplace.vendor',
+        string='Vendor',
+        required=True,
+        default=lambda self: self.env['marketplace.vendor'].search(
+            [('user_id', '=', self.env.uid)], limit=1
+        )
+    )
+    file = fields.Binary(string='File', required=True, attachment=True)
+    filename = fields.Char(string='Filename')
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    ], string='Format', default='csv', required=True)
+    chunk_size = fields.Integer(
+        string='Chunk Size',
+        default=500,
+        help="Number of products created per batch"
+    )
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], default='draft')
+    created_count = fields.Integer(string='Created Products', readonly=True)
+    error_count = fields.Integer(string='Rejected Rows', readonly=True)
+    error_file = fields.Binary(string='Error Report', readonly=True, attachment=True)
+    error_filename = fields.Char(string='Error Report Filename', readonly=True)
+
+    @api.onchange('filename')
+    def _onchange_filename(self):
+        if self.filename and self.filename.lower().endswith(('.json', '.jsonl', '.ndjson')):
+            self.file_format = 'jsonl'
+        elif self.filename:
+            self.file_format = 'csv'
+
+    def action_import(self):
+        """Import the products of the file"""
+        self.ensure_one()
+        if self.chunk_size <= 0:
+            raise UserError(_('The chunk size must be positive.'))
+
+        lookups = self._get_lookups()
+        created = rejected = 0
+        chunk = []
+
+        with tempfile.TemporaryFile(mode='w+', newline='') as error_buffer:
+            errors = csv.writer(error_buffer)
+            errors.writerow(['line', 'error'])
+
+            with self._open_file() as stream:
+                for line_number, row in self._iter_rows(stream):
+                    try:
+                        chunk.append((line_number, self._prepare_product_vals(row, lookups)))
+                    except ValueError as e:
+                        errors.writerow([line_number, str(e)])
+                        rejected += 1
+                        continue
+
+                    if len(chunk) >= self.chunk_size:
+                        count = self._create_chunk(chunk, lookups, errors)
+                        created += count
+                        rejected += len(chunk) - count
+                        chunk = []
+                        _logger.info('Product import of vendor %s: %d created, %d rejected',
+                                     self.vendor_id.code, created, rejected)
+
+                if chunk:
+                    count = self._create_chunk(chunk, lookups, errors)
+                    created += count
+                    rejected += len(chunk) - count
+
+            values = {
+                'state': 'done',
+                'created_count': created,
+                'error_count': rejected,
+            }
+            if rejected:
+                error_buffer.seek(0)
+                values['error_file'] = base64.b64encode(error_buffer.read().encode())
+                values['error_filename'] = 'import_errors.csv'
+            self.write(values)
+
+        _logger.info('Product import of vendor %s done: %d created, %d rejected',
+                     self.vendor_id.code, created, rejected)
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def _open_file(self):
+        """Return a binary stream on the uploaded file, read from the filestore when possible"""
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'file'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        if not attachment:
+            raise UserError(_('Please upload a file to import.'))
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        return io.BytesIO(attachment.raw or b'')
+
+    def _iter_rows(self, stream):
+        """Yield ``(line_number, row)`` pairs; ``row`` is None for unparsable lines"""
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        line_number = 0
+        try:
+            if self.file_format == 'csv':
+                reader = csv.DictReader(text)
+                for row in reader:
+                    line_number = reader.line_num
+                    yield line_number, row
+            else:
+                for line_number, line in enumerate(text, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        row = None
+                    yield line_number, row
+        except UnicodeDecodeError as e:
+            raise UserError(_(
+                'The file is not encoded in UTF-8: the text after line %(line)d could not be '
+                'decoded (%(error)s). Save the file as UTF-8 and import it again.'
+            ) % {'line': line_number, 'error': e.reason})
+
+    def _get_lookups(self):
+        """Load the category and tag maps used to resolve the rows"""
+        categories = self.env['marketplace.category'].search_read([], ['name', 'complete_name'])
+        category_map = {}
+        for category in categories:
+            key = category['name'].strip().lower()
+            # Names shared by several categories must be given by their full path
+            category_map[key] = False if key in category_map else category['id']
+        for category in categories:
+            category_map[category['complete_name'].strip().lower()] = category['id']
+
+        tags = self.env['marketplace.product.tag'].sudo().search_read([], ['name'])
+        return {
+            'category': category_map,
+            'category_ids': {category['id'] for category in categories},
+            'tag': {tag['name'].strip().lower(): tag['id'] for tag in tags},
+        }
+
+    def _prepare_product_vals(self, row, lookups):
+        """Validate a row and convert it to product values, raise ValueError if invalid"""
+        if not isinstance(row, dict):
+            raise ValueError(_('Invalid row'))
+
+        name = str(row.get('name') or '').strip()
+        if not name:
+            raise ValueError(_('Missing product name'))
+
+        vals = {
+            'name': name,
+            'vendor_id': self.vendor_id.id,
+            'category_id': self._resolve_category(row, lookups),
+        }
+        if row.get('code'):
+            vals['code'] = str(row['code']).strip()
+
+        for column in FLOAT_COLUMNS:
+            value = row.get(column)
+            if value in (None, ''):
+                continue
+            try:
+                vals[column] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(_('Invalid number for %s: %s') % (column, value))
+            if vals[column] < 0:
+                raise ValueError(_('%s cannot be negative') % column)
+        if 'list_price' not in vals:
+            raise ValueError(_('Missing sale price'))
+        if vals.get('discount_percentage'):
+            if vals['discount_percentage'] > 100:
+                raise ValueError(_('Discount percentage must be between 0 and 100'))
+            vals['has_discount'] = True
+
+        for column in TEXT_COLUMNS:
+            if row.get(column):
+                vals[column] = str(row[column])
+
+        product_type = row.get('product_type')
+        if product_type:
+            if product_type not in ('physical', 'digital', 'service'):
+                raise ValueError(_('Invalid product type: %s') % product_type)
+            vals['product_type'] = product_type
+
+        tags = row.get('tags') or []
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        # Tag names are resolved to ids when the chunk is created
+        vals['tag_ids'] = [str(tag).strip() for tag in tags if str(tag).strip()]
+        return vals
+
+    def _resolve_category(self, row, lookups):
+        category = row.get('category_id') or row.get('category')
+        if not category:
+            raise ValueError(_('Missing category'))
+        if isinstance(category, int) or str(category).strip().isdigit():
+            category_id = int(category)
+            if category_id not in lookups['category_ids']:
+                raise ValueError(_('Unknown category: %s') % category)
+            return category_id
+
+        category_id = lookups['category'].get(str(category).strip().lower())
+        if category_id is None:
+            raise ValueError(_('Unknown category: %s') % category)
+        if not category_id:
+            raise ValueError(_('Ambiguous category %s, use its full path') % category)
+        return category_id
+
+    def _create_chunk(self, chunk, lookups, errors):
+        """Create the products of a chunk and return how many were created.
+
+        The whole chunk is created in one batch; if that fails, its rows
+        are created one by one to report the failing ones.
+        """
+        self._create_missing_tags(chunk, lookups)
+        Product = self.env['marketplace.product'].with_context(
+            mail_create_nolog=True,
+            mail_create_nosubscribe=True,
+            tracking_disable=True,
+        )
+        created = 0
+        try:
+            with self.env.cr.savepoint():
+                Product.create([self._get_create_vals(vals, lookups) for line_number, vals in chunk])
+            created = len(chunk)
+        except Exception:
+            # create() fills the values in place (sequence codes...), so every
+            # row is retried with values rebuilt from the parsed row
+            for line_number, vals in chunk:
+                try:
+                    with self.env.cr.savepoint():
+                        Product.create(self._get_create_vals(vals, lookups))
+                    created += 1
+                except Exception as e:
+                    errors.writerow([line_number, str(e)])
+
+        # Drop the created records from the cache to keep memory flat
+        self.env.invalidate_all()
+        return created
+
+    def _get_create_vals(self, vals, lookups):
+        """Return a fresh copy of the row values, with the tag names resolved to ids"""
+        return dict(vals, tag_ids=[Command.set([lookups['tag'][tag.lower()] for tag in vals['tag_ids']])])
+
+    def _create_missing_tags(self, chunk, lookups):
+        """Create the unknown tags of a chunk in one batch"""
+        missing = {}
+        for line_number, vals in chunk:
+            for tag in vals['tag_ids']:
+                if tag.lower() not in lookups['tag']:
+                    missing.setdefault(tag.lower(), tag)
+        if missing:
+            tags = self.env['marketplace.product.tag'].sudo().create([
+                {'name': name} for name in missing.values()
+            ])
+            lookups['tag'].update((tag.name.lower(), tag.id) for tag in tags)
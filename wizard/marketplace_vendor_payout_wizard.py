@@ -17,7 +17,8 @@ class MarketplaceVendorPayoutWizard(models.TransientModel):
 	commission_ids = fields.Many2many(
 		'marketplace.commission',
 		string='Commissions',
-		domain="[('vendor_id', '=', vendor_id), ('state', '=', 'confirmed'), ('payout_id', '=', False)]"
+		domain="[('vendor_id', '=', vendor_id), ('state', '=', 'confirmed'), ('payout_id', '=', False)]",
+		help="Leave empty to pay out all the confirmed commissions of the vendor"
 	)
     
 	total_amount = fields.Monetary(
@@ -46,47 +47,50 @@ class MarketplaceVendorPayoutWizard(models.TransientModel):
     
 	notes = fields.Text(string='Notes')
 
-	@api.depends('commission_ids')
+	@api.depends('vendor_id', 'commission_ids')
 	def _compute_total_amount(self):
 		for wizard in self:
-			wizard.total_amount = sum(wizard.commission_ids.mapped('vendor_amount'))
-
-	@api.onchange('vendor_id')
-	def _onchange_vendor_id(self):
-		"""Load unpaid commissions for vendor"""
-		if self.vendor_id:
-			unpaid_commissions = self.env['marketplace.commission'].search([
-				('vendor_id', '=', self.vendor_id.id),
-				('state', '=', 'confirmed'),
-				('payout_id', '=', False)
-			])
-			self.commission_ids = [(6, 0, unpaid_commissions.ids)]
+			if wizard.commission_ids:
+				wizard.total_amount = sum(wizard.commission_ids.mapped('vendor_amount'))
+			elif wizard.vendor_id:
+				# Sum the unpaid commissions in SQL rather than loading them
+				[[amount]] = self.env['marketplace.commission']._read_group([
+					('vendor_id', '=', wizard.vendor_id.id),
+					('state', '=', 'confirmed'),
+					('payout_id', '=', False),
+				], aggregates=['vendor_amount:sum'])
+				wizard.total_amount = amount
+			else:
+				wizard.total_amount = 0.0
 
 	def action_create_payout(self):
 		"""Create payout record"""
 		self.ensure_one()
         
-		if not self.commission_ids:
-			raise UserError(_('Please select at least one commission to include in the payout'))
-        
-		# Create payout
 		payout_vals = {
-			'vendor_id': self.vendor_id.id,
 			'payout_date': self.payout_date,
 			'payment_method': self.payment_method,
 			'notes': self.notes,
 		}
+		if self.commission_ids:
+			payouts = self.env['marketplace.payout'].create(dict(payout_vals, vendor_id=self.vendor_id.id))
+			self.commission_ids.write({'payout_id': payouts.id})
+		else:
+			# All the unpaid commissions, one payout per currency, whatever the minimum payout
+			payouts = self.env['marketplace.payout']._create_payouts(
+				vendor_ids=self.vendor_id.ids, vals=payout_vals, check_minimum=False
+			)
+			if not payouts:
+				raise UserError(_('This vendor has no confirmed commission to pay out'))
         
-		payout = self.env['marketplace.payout'].create(payout_vals)
-        
-		# Link commissions to payout
-		self.commission_ids.write({'payout_id': payout.id})
-        
-		return {
+		action = {
 			'type': 'ir.actions.act_window',
+			'name': _('Payouts'),
 			'res_model': 'marketplace.payout',
-			'res_id': payout.id,
-			'view_mode': 'form',
 			'target': 'current',
 		}
-
+		if len(payouts) == 1:
+			action.update(res_id=payouts.id, view_mode='form')
+		else:
+			action.update(domain=[('id', 'in', payouts.ids)], view_mode='tree,form')
+		return action